@@ -0,0 +1,258 @@
+"""Chunked memory-mapped NumPy arrays for fast access to crops of large examples.
+
+A `ChunkedArray` is stored as a `.npy` file in a blocked layout: the leading dimensions
+are split into chunks and each chunk is contiguous on disk. Reading a region only
+touches the pages of the chunks which overlap it. Regions inside of one chunk are
+returned as zero-copy views of the memory-mapped file.
+
+An array store is a local directory with one sub-directory per split and example:
+
+    <directory>/metadata.json
+    <directory>/<split>/<key>/<name>.npy   (and <name>.json for chunked arrays)
+
+Use `ArrayStore` to read it (e.g. after `hci_lf.HciLf.export_array_store`).
+"""
+import itertools
+import json
+import os
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+METADATA_FILE = "metadata.json"
+
+
+class ChunkedArray:
+    """An array stored in chunks over its leading dimensions in a memory-mapped file.
+
+    Index the array with integers and slices (step 1) for the chunked dimensions. The
+    trailing dimensions can be indexed with any NumPy basic index.
+
+    Args:
+        path: The path to the `.npy` file.
+        mode: The mode of `np.load` ("r" for read-only or "r+" to write).
+    """
+
+    def __init__(self, path: str, mode: Literal["r", "r+"] = "r") -> None:
+        with open(_info_path(path), "r") as f:
+            info = json.load(f)
+        self.shape: Tuple[int, ...] = tuple(info["shape"])
+        self.chunk_shape: Tuple[int, ...] = tuple(info["chunk_shape"])
+        # Shape [*num_chunks, *chunk_shape, *shape[len(chunk_shape):]]
+        self._data = np.load(path, mmap_mode=mode)
+
+    @classmethod
+    def create(
+        cls,
+        path: str,
+        shape: Sequence[int],
+        dtype: Any,
+        chunk_shape: Sequence[int],
+    ) -> "ChunkedArray":
+        """Create a new zero-initialized chunked array which can be written to.
+
+        Args:
+            path: The path to the `.npy` file.
+            shape: The shape of the array.
+            dtype: The data type of the array.
+            chunk_shape: The shape of the chunks of the leading dimensions. The chunks
+                at the end of a dimension are padded.
+
+        Returns:
+            The writable array.
+        """
+        shape, chunk_shape = tuple(shape), tuple(chunk_shape)
+        if len(chunk_shape) > len(shape):
+            raise ValueError(
+                f"The chunk shape {chunk_shape} has more dimensions than the shape "
+                f"{shape}."
+            )
+        num_chunks = tuple(-(-n // c) for n, c in zip(shape, chunk_shape))
+        blocked_shape = (*num_chunks, *chunk_shape, *shape[len(chunk_shape) :])
+        np.lib.format.open_memmap(
+            path, mode="w+", dtype=dtype, shape=blocked_shape
+        ).flush()
+        with open(_info_path(path), "w") as f:
+            json.dump({"shape": shape, "chunk_shape": chunk_shape}, f)
+        return cls(path, mode="r+")
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._data.dtype
+
+    @property
+    def num_chunks(self) -> Tuple[int, ...]:
+        return self._data.shape[: len(self.chunk_shape)]
+
+    def chunk(self, index: Sequence[int]) -> np.ndarray:
+        """Get a zero-copy view of the chunk with the given index in the chunk grid."""
+        index = tuple(index)
+        valid = tuple(
+            slice(0, min(c, n - i * c))
+            for i, c, n in zip(index, self.chunk_shape, self.shape)
+        )
+        return self._data[index][valid]
+
+    def __getitem__(self, key) -> np.ndarray:
+        region, squeeze, rest = self._parse_key(key)
+        first, last = self._chunk_range(region)
+        if first == last:
+            # Inside of one chunk: a view of the memory-mapped file
+            offsets = [i * c for i, c in zip(first, self.chunk_shape)]
+            out = self._data[tuple(first)][
+                tuple(slice(s - o, e - o) for (s, e), o in zip(region, offsets))
+            ]
+        else:
+            out = np.empty(
+                (*(e - s for s, e in region), *self.shape[len(region) :]), self.dtype
+            )
+            for index, target, source in self._overlaps(region, first, last):
+                out[target] = self._data[index][source]
+        out = out[tuple(0 if s else slice(None) for s in squeeze)]
+        return out[(slice(None),) * squeeze.count(False) + rest]
+
+    def __setitem__(self, key, value) -> None:
+        region, squeeze, rest = self._parse_key(key)
+        if rest:
+            raise IndexError("Only the chunked dimensions can be indexed for writing.")
+        shape = (*(e - s for s, e in region), *self.shape[len(region) :])
+        squeeze = squeeze + [False] * (len(shape) - len(squeeze))
+        squeezed_shape = [n for n, s in zip(shape, squeeze) if not s]
+        value = np.broadcast_to(np.asarray(value, self.dtype), squeezed_shape)
+        value = value.reshape(shape)
+        first, last = self._chunk_range(region)
+        for index, target, source in self._overlaps(region, first, last):
+            self._data[index][source] = value[target]
+
+    def flush(self) -> None:
+        """Write the changes to disk."""
+        self._data.flush()
+
+    def _parse_key(self, key):
+        """Get the region [start, stop) of the chunked dimensions from an index."""
+        if not isinstance(key, tuple):
+            key = (key,)
+        num_chunked = len(self.chunk_shape)
+        region, squeeze = [], []
+        for dim, k in enumerate(key[:num_chunked]):
+            size = self.shape[dim]
+            if isinstance(k, slice):
+                start, stop, step = k.indices(size)
+                if step != 1:
+                    raise IndexError("Slices with a step are not supported.")
+                region.append((start, max(start, stop)))
+                squeeze.append(False)
+            else:
+                k = int(k)
+                if not -size <= k < size:
+                    raise IndexError(f"Index {k} is out of bounds for size {size}.")
+                k = k % size
+                region.append((k, k + 1))
+                squeeze.append(True)
+        for dim in range(len(region), num_chunked):
+            region.append((0, self.shape[dim]))
+            squeeze.append(False)
+        return region, squeeze, key[num_chunked:]
+
+    def _chunk_range(self, region) -> Tuple[List[int], List[int]]:
+        first = [s // c for (s, _), c in zip(region, self.chunk_shape)]
+        last = [max(s, e - 1) // c for (s, e), c in zip(region, self.chunk_shape)]
+        return first, last
+
+    def _overlaps(self, region, first, last):
+        """Yields the chunk index, the output and the chunk slices of each overlap."""
+        if any(s == e for s, e in region):
+            return
+        ranges = [range(f, l + 1) for f, l in zip(first, last)]
+        for index in itertools.product(*ranges):
+            target, source = [], []
+            for i, (s, e), c in zip(index, region, self.chunk_shape):
+                lo, hi = max(s, i * c), min(e, (i + 1) * c)
+                target.append(slice(lo - s, hi - s))
+                source.append(slice(lo - i * c, hi - i * c))
+            yield index, tuple(target), tuple(source)
+
+
+def write_example(
+    directory: str,
+    arrays: Dict[str, np.ndarray],
+    chunk_shapes: Optional[Dict[str, Sequence[int]]] = None,
+) -> None:
+    """Write the arrays of one example into a directory of the store.
+
+    Args:
+        directory: The directory of the example.
+        arrays: The arrays by name.
+        chunk_shapes: The chunk shapes of the arrays which should be chunked. Other
+            arrays are written as plain `.npy` files.
+    """
+    chunk_shapes = chunk_shapes or {}
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        path = os.path.join(directory, name + ".npy")
+        if name in chunk_shapes:
+            chunked = ChunkedArray.create(
+                path, array.shape, array.dtype, chunk_shapes[name]
+            )
+            chunked[:] = array
+            chunked.flush()
+        else:
+            np.save(path, array)
+
+
+def write_metadata(directory: str, metadata: Dict[str, Any]) -> None:
+    """Write the metadata of the store. `metadata["splits"]` lists the example keys."""
+    with open(os.path.join(directory, METADATA_FILE), "w") as f:
+        json.dump(metadata, f)
+
+
+class ArrayStore:
+    """Reader for an array store on the local disk.
+
+    Example:
+
+        store = array_store.ArrayStore("/data/hci_lf_store")
+        example = store.load("train", "boxes")
+        crop = example["lf"][40, 100:164, 200:264]  # One view, zero-copy
+        disparity = example["disparity"][100:164, 200:264]
+
+    Args:
+        directory: The directory of the store.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        with open(os.path.join(directory, METADATA_FILE), "r") as f:
+            self.metadata: Dict[str, Any] = json.load(f)
+
+    @property
+    def splits(self) -> List[str]:
+        return list(self.metadata["splits"])
+
+    def keys(self, split: str) -> List[str]:
+        """The keys of the examples of a split."""
+        return list(self.metadata["splits"][split])
+
+    def load(self, split: str, key: str) -> Dict[str, Union[ChunkedArray, np.ndarray]]:
+        """Open the arrays of one example without reading them.
+
+        Returns:
+            The arrays by name. Chunked arrays are `ChunkedArray` and other arrays are
+            read-only `np.memmap`.
+        """
+        directory = os.path.join(self.directory, split, key)
+        arrays: Dict[str, Union[ChunkedArray, np.ndarray]] = {}
+        for file_name in sorted(os.listdir(directory)):
+            name, ext = os.path.splitext(file_name)
+            if ext != ".npy":
+                continue
+            path = os.path.join(directory, file_name)
+            if os.path.exists(_info_path(path)):
+                arrays[name] = ChunkedArray(path)
+            else:
+                arrays[name] = np.load(path, mmap_mode="r")
+        return arrays
+
+
+def _info_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".json"
@@ -0,0 +1,79 @@
+"""Tests for the chunked memory-mapped arrays."""
+
+import os
+
+import numpy as np
+import tensorflow_datasets as tfds
+
+from . import array_store
+
+
+class ArrayStoreTest(tfds.testing.TestCase):
+    """Tests for array_store."""
+
+    def setUp(self):
+        super(ArrayStoreTest, self).setUp()
+        self.array = np.random.default_rng(0).integers(0, 255, (5, 10, 7, 3), np.uint8)
+        self.path = os.path.join(self.tmp_dir, "array.npy")
+        chunked = array_store.ChunkedArray.create(
+            self.path, self.array.shape, np.uint8, chunk_shape=(2, 4, 4)
+        )
+        chunked[:] = self.array
+        chunked.flush()
+        self.chunked = array_store.ChunkedArray(self.path)
+
+    def test_read(self):
+        self.assertEqual(self.chunked.shape, self.array.shape)
+        self.assertEqual(self.chunked.num_chunks, (3, 3, 2))
+        for key in [
+            (slice(None),),
+            (1, slice(2, 9), slice(1, 7)),
+            (slice(1, 4), 9, slice(None), 1),
+            (-1, slice(-3, None), 6),
+            (slice(2, 2),),
+        ]:
+            np.testing.assert_array_equal(self.chunked[key], self.array[key])
+        with self.assertRaises(IndexError):
+            self.chunked[5]
+        with self.assertRaises(IndexError):
+            self.chunked[::2]
+
+    def test_zero_copy(self):
+        crop = self.chunked[2, 4:8, 4:7]
+        self.assertIsInstance(crop, np.memmap)
+        self.assertFalse(crop.flags.owndata)
+        np.testing.assert_array_equal(crop, self.array[2, 4:8, 4:7])
+        # The chunk at the end of the dimensions is not padded
+        np.testing.assert_array_equal(
+            self.chunked.chunk((2, 2, 1)), self.array[4:, 8:, 4:]
+        )
+
+    def test_write(self):
+        chunked = array_store.ChunkedArray(self.path, mode="r+")
+        chunked[1:3, 3:6, 2] = 7
+        chunked.flush()
+        self.array[1:3, 3:6, 2] = 7
+        reloaded = array_store.ChunkedArray(self.path)
+        np.testing.assert_array_equal(reloaded[:], self.array)
+
+    def test_store(self):
+        directory = os.path.join(self.tmp_dir, "store")
+        depth = np.ones((10, 7), np.float32)
+        array_store.write_example(
+            os.path.join(directory, "train", "a"),
+            {"lf": self.array, "depth": depth},
+            chunk_shapes={"lf": (1, 8, 8)},
+        )
+        array_store.write_metadata(directory, {"splits": {"train": ["a"]}})
+        store = array_store.ArrayStore(directory)
+        self.assertEqual(store.splits, ["train"])
+        self.assertEqual(store.keys("train"), ["a"])
+        example = store.load("train", "a")
+        self.assertIsInstance(example["lf"], array_store.ChunkedArray)
+        np.testing.assert_array_equal(example["lf"][3], self.array[3])
+        self.assertIsInstance(example["depth"], np.memmap)
+        np.testing.assert_array_equal(example["depth"], depth)
+
+
+if __name__ == "__main__":
+    tfds.testing.test_main()
@@ -0,0 +1,271 @@
+"""Benchmarks of generating and reading the datasets on their dummy data.
+
+Run all benchmarks and compare them against a stored baseline:
+
+    python -m tensorflow_datasets_bw.benchmark --output results.json
+    python -m tensorflow_datasets_bw.benchmark --output new.json --baseline results.json
+
+The generation and the reading of each builder run in fresh processes such that the
+peak resident set size (RSS) only includes this step. The results are written as JSON.
+With `--baseline` the exit code is 1 if a metric is worse than the baseline by more
+than the tolerance.
+"""
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import tensorflow as tf
+import tensorflow_datasets as tfds
+from tensorflow_datasets.core.utils import benchmark as tfds_benchmark
+
+from . import (
+    bsds500,
+    cbsd68,
+    flickr2k,
+    hci_lf,
+    kodak24,
+    mc_master,
+    mdsp_color_sr,
+    schelten_kernels,
+    set5,
+    set14,
+    testing,
+    vid4,
+    waterloo_exploration,
+)
+
+# Metrics which are compared against the baseline and if larger values are better
+METRICS = {
+    "generate.examples_per_sec": True,
+    "generate.mb_per_sec": True,
+    "generate.peak_rss_mb": False,
+    "read.examples_per_sec": True,
+    "read.mb_per_sec": True,
+    "read.first_example_latency_sec": False,
+    "read.peak_rss_mb": False,
+}
+
+
+class BuilderBenchmark:
+    """Benchmark of one builder config on the dummy data of the builder.
+
+    Args:
+        builder_class: The DatasetBuilder class.
+        config: The name of the builder config (None for the default config).
+        dl_result: The result of the mocked downloads relative to the dummy data
+            directory (as `DL_EXTRACT_RESULT` of the builder tests). None for builders
+            which read from the manual directory.
+        builder_kwargs: Additional arguments of the builder (e.g. read-time options).
+    """
+
+    def __init__(
+        self,
+        builder_class,
+        config: Optional[str] = None,
+        dl_result: Union[None, str, Dict[str, str]] = None,
+        builder_kwargs: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.builder_class = builder_class
+        self.config = config
+        self.dl_result = dl_result
+        self.builder_kwargs = builder_kwargs or {}
+
+    @property
+    def name(self) -> str:
+        return self.builder_class.name
+
+    def create_builder(self, data_dir: str) -> tfds.core.DatasetBuilder:
+        return self.builder_class(
+            data_dir=data_dir, config=self.config, **self.builder_kwargs
+        )
+
+
+BENCHMARKS = [
+    BuilderBenchmark(bsds500.Bsds500, "all", dl_result="."),
+    BuilderBenchmark(cbsd68.Cbsd68, "default", dl_result="."),
+    BuilderBenchmark(flickr2k.Flickr2k, "default"),
+    BuilderBenchmark(hci_lf.HciLf, "simulated"),
+    BuilderBenchmark(kodak24.Kodak24, dl_result={"01": "kodim01.png"}),
+    BuilderBenchmark(mc_master.McMaster),
+    BuilderBenchmark(
+        mdsp_color_sr.MdspColorSr, dl_result={"face_adyoron_1": "face_adyoron_1.mat"}
+    ),
+    BuilderBenchmark(schelten_kernels.ScheltenKernels, "all", dl_result="kernels.mat"),
+    BuilderBenchmark(set5.Set5, "default", dl_result="."),
+    BuilderBenchmark(set14.Set14, "default", dl_result="."),
+    BuilderBenchmark(vid4.Vid4, "default", dl_result="."),
+    BuilderBenchmark(waterloo_exploration.WaterlooExploration),
+]
+
+
+def benchmark_generate(benchmark: BuilderBenchmark, data_dir: str) -> Dict[str, Any]:
+    """Generate the dataset from the dummy data and measure the throughput."""
+    builder = benchmark.create_builder(data_dir)
+    start = time.perf_counter()
+    testing.prepare_from_dummy_data(builder, dl_result=benchmark.dl_result)
+    seconds = time.perf_counter() - start
+    num_examples, num_mb = _split_sizes(builder)
+    return {
+        "num_examples": num_examples,
+        "num_mb": num_mb,
+        "seconds": seconds,
+        "examples_per_sec": num_examples / seconds,
+        "mb_per_sec": num_mb / seconds,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def benchmark_read(benchmark: BuilderBenchmark, data_dir: str) -> Dict[str, Any]:
+    """Read all splits of the generated dataset and measure the throughput."""
+    builder = benchmark.create_builder(data_dir)
+    start = time.perf_counter()
+    datasets = [builder.as_dataset(split=split) for split in builder.info.splits]
+    dataset = datasets[0]
+    for split_dataset in datasets[1:]:
+        dataset = dataset.concatenate(split_dataset)
+    as_dataset_sec = time.perf_counter() - start
+    # The timing of `tfds.benchmark` without the summary tables (requires pandas)
+    stats = tfds_benchmark.raw_benchmark(dataset)
+    seconds = as_dataset_sec + stats.total_time_s()
+    _, num_mb = _split_sizes(builder)
+    return {
+        "num_examples": stats.num_examples,
+        "seconds": seconds,
+        "examples_per_sec": stats.num_examples / seconds,
+        "mb_per_sec": num_mb / seconds,
+        "first_example_latency_sec": as_dataset_sec + stats.time_until_first(),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run(names: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Run the benchmarks. Each generation and reading runs in a fresh process.
+
+    Args:
+        names: The names of the builders to benchmark. Defaults to all builders.
+
+    Returns:
+        The results by builder name and information about the environment.
+    """
+    benchmarks = [b for b in BENCHMARKS if names is None or b.name in names]
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        for benchmark in benchmarks:
+            results[benchmark.name] = {
+                "config": benchmark.config,
+                "generate": _run_in_process(benchmark_generate, benchmark, data_dir),
+                "read": _run_in_process(benchmark_read, benchmark, data_dir),
+            }
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "tensorflow": tf.__version__,
+            "tensorflow_datasets": tfds.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.2
+) -> List[str]:
+    """Compare benchmark results against a baseline.
+
+    Args:
+        results: The results of `run`.
+        baseline: The results of `run` stored as the baseline.
+        tolerance: The relative change of a metric which is accepted.
+
+    Returns:
+        A description of each metric which is worse than the baseline by more than the
+        tolerance. Builders or metrics missing in one of the results are ignored.
+    """
+    regressions = []
+    for name, result in results["results"].items():
+        if name not in baseline["results"]:
+            continue
+        for metric, larger_is_better in METRICS.items():
+            value = _get_metric(result, metric)
+            reference = _get_metric(baseline["results"][name], metric)
+            if value is None or reference is None or reference == 0:
+                continue
+            change = (value - reference) / reference
+            if (larger_is_better and change < -tolerance) or (
+                not larger_is_better and change > tolerance
+            ):
+                regressions.append(
+                    f"{name} {metric}: {value:.4g} (baseline {reference:.4g}, "
+                    f"{change:+.0%})"
+                )
+    return regressions
+
+
+def _run_in_process(function, *args):
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return executor.submit(function, *args).result()
+
+
+def _split_sizes(builder: tfds.core.DatasetBuilder) -> Tuple[int, float]:
+    """The number of examples and the size in MB of all splits."""
+    splits = builder.info.splits.values()
+    return sum(s.num_examples for s in splits), sum(s.num_bytes for s in splits) / 2**20
+
+
+def _get_metric(result: Dict[str, Any], metric: str) -> Optional[float]:
+    value: Any = result
+    for part in metric.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 2**20 if sys.platform == "darwin" else max_rss / 2**10
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--output", required=True, help="The JSON file for results.")
+    parser.add_argument("--baseline", help="A JSON file with results to compare to.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="The accepted relative change of a metric (default: 0.2).",
+    )
+    parser.add_argument(
+        "--builders", nargs="+", help="The builders to benchmark (default: all)."
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.builders)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, tolerance=args.tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""Tests for the dataset benchmarks."""
+
+import tensorflow_datasets as tfds
+
+from . import benchmark
+
+
+class BenchmarkTest(tfds.testing.TestCase):
+    """Tests for benchmark."""
+
+    def test_all_builders(self):
+        self.assertLen({b.name for b in benchmark.BENCHMARKS}, 12)
+
+    def test_run(self):
+        results = benchmark.run(["set5"])
+        self.assertEqual(list(results["results"]), ["set5"])
+        result = results["results"]["set5"]
+        self.assertEqual(result["generate"]["num_examples"], 2)
+        self.assertEqual(result["read"]["num_examples"], 2)
+        for metric in benchmark.METRICS:
+            self.assertGreater(benchmark._get_metric(result, metric), 0)
+        self.assertIsNone(benchmark._get_metric(result, "generate"))
+
+    def test_compare(self):
+        baseline = {
+            "results": {
+                "set5": {"read": {"examples_per_sec": 10.0, "peak_rss_mb": 100.0}},
+                "set14": {"read": {"examples_per_sec": 10.0}},
+            }
+        }
+        results = {
+            "results": {
+                "set5": {"read": {"examples_per_sec": 7.0, "peak_rss_mb": 110.0}},
+                "set14": {"read": {"examples_per_sec": 20.0}},
+                "kodak24": {"read": {"examples_per_sec": 1.0}},
+            }
+        }
+        regressions = benchmark.compare(results, baseline, tolerance=0.2)
+        self.assertLen(regressions, 1)
+        self.assertStartsWith(regressions[0], "set5 read.examples_per_sec")
+        self.assertLen(benchmark.compare(results, baseline, tolerance=0.05), 2)
+
+
+if __name__ == "__main__":
+    tfds.testing.test_main()
@@ -1,14 +1,22 @@
 """The Berkeley dataset for contour detection and image segmentation."""
 
 import os
+from typing import Optional
 
 import tensorflow as tf
 import tensorflow_datasets as tfds
 
+from .. import degradation, random_access, utils
+
 _DESCRIPTION = """
 Color BSD68 dataset for image denoising benchmarks.
 It is part of The Berkeley Segmentation Dataset and
 Benchmark https://www2.eecs.berkeley.edu/Research/Projects/CS/vision/bsds/
+
+The 'default' config only stores the original images. Noisy images can be synthesized
+when reading the dataset by giving `noise_sigma` to the builder. The noise is seeded by
+the id of the image and reproducible. The 'noisy*' configs store the noisy images of the
+dataset for exact comparisons with published results.
 """
 
 _CITATION = """
@@ -28,27 +36,76 @@ DOWNLOAD_PATH = "https://github.com/clausmichele/CBSD68-dataset/archive/51a07a95
 
 HOMEPAGE = "https://github.com/clausmichele/CBSD68-dataset"
 
-# TODO add configs for noise levels
+NOISE_LEVELS = [5, 10, 15, 25, 35, 50]
+
+
+class Cbsd68Config(tfds.core.BuilderConfig):
+    """BuilderConfig for Cbsd68.
+
+    If `noise_level` is set, the noisy images of the dataset with this noise level are
+    stored with the original images.
+    """
 
+    def __init__(self, noise_level: Optional[int] = None, **kwargs):
+        super(Cbsd68Config, self).__init__(**kwargs)
+        self.noise_level = noise_level
 
-class Cbsd68(tfds.core.GeneratorBasedBuilder):
+
+class Cbsd68(random_access.IndexedBuilderMixin, tfds.core.GeneratorBasedBuilder):
     """The Berkeley dataset for contour detection and image segmentation."""
 
-    VERSION = tfds.core.Version("0.0.1")
+    VERSION = tfds.core.Version("0.1.0")
     RELEASE_NOTES = {
         "0.0.1": "Alpha release.",
+        "0.1.0": "Add the image id and configs with the noisy images of the dataset.",
     }
 
+    BUILDER_CONFIGS = [
+        Cbsd68Config(name="default", description="The original images."),
+        *[
+            Cbsd68Config(
+                name=f"noisy{noise_level}",
+                description=(
+                    f"The original images and the noisy images of the dataset with "
+                    f"sigma={noise_level}."
+                ),
+                noise_level=noise_level,
+            )
+            for noise_level in NOISE_LEVELS
+        ],
+    ]
+
+    def __init__(
+        self,
+        data_dir=None,
+        config=None,
+        version=None,
+        noise_sigma: Optional[float] = None,
+        seed: int = 0,
+        quantize: bool = False,
+        num_parallel_calls: Optional[int] = tf.data.AUTOTUNE,
+        deterministic: Optional[bool] = None,
+    ) -> None:
+        super(Cbsd68, self).__init__(data_dir=data_dir, config=config, version=version)
+
+        # Standard deviation of the noise added when reading the 'default' config
+        self.noise_sigma = noise_sigma
+        self.seed = seed
+        self.quantize = quantize
+        self.num_parallel_calls = num_parallel_calls
+        self.deterministic = deterministic
+
     def _info(self):
+        features = {
+            "image": tfds.features.Image(),
+            "id": tfds.features.Text(),
+        }
+        if self.builder_config.noise_level is not None:
+            features["noisy"] = tfds.features.Image()
         return tfds.core.DatasetInfo(
             builder=self,
             description=_DESCRIPTION,
-            features=tfds.features.FeaturesDict(
-                {
-                    "image": tfds.features.Image()
-                    # TODO add noisy
-                }
-            ),
+            features=tfds.features.FeaturesDict(features),
             homepage=HOMEPAGE,
             citation=_CITATION,
         )
@@ -62,16 +119,64 @@ class Cbsd68(tfds.core.GeneratorBasedBuilder):
             "CBSD68-dataset-51a07a95884ac7c8bdd5d1614f9da781adc3c4a0",
             "CBSD68",
         )
-        original_path = os.path.join(data_path, "original_png")
         return {
-            "test": self._generate_examples(original_path),
+            "test": self._generate_examples(data_path),
         }
 
-    def _generate_examples(self, original_path):
+    def _generate_examples(self, data_path):
         """Yields examples."""
+        original_path = os.path.join(data_path, "original_png")
+        noise_level = self.builder_config.noise_level
         files = sorted(tf.io.gfile.listdir(original_path))
         image_files = filter(lambda f: f.endswith(".png"), files)
 
         for image_file in image_files:
             image_id = image_file[:-4]
-            yield image_id, {"image": os.path.join(original_path, image_file)}
+            example = {
+                "image": os.path.join(original_path, image_file),
+                "id": image_id,
+            }
+            if noise_level is not None:
+                example["noisy"] = os.path.join(
+                    data_path, f"noisy{noise_level}", image_file
+                )
+            yield image_id, example
+
+    def _as_dataset(
+        self,
+        split=tfds.Split.TEST,
+        decoders=None,
+        read_config=None,
+        shuffle_files=False,
+    ):
+        dataset = super(Cbsd68, self)._as_dataset(
+            split=split,
+            decoders=decoders,
+            read_config=read_config,
+            shuffle_files=shuffle_files,
+        )
+
+        if self.noise_sigma is None:
+            return dataset
+        if self.builder_config.noise_level is not None:
+            raise ValueError(
+                "noise_sigma can only be used with the 'default' config. The config "
+                + f"'{self.builder_config.name}' contains the noisy images."
+            )
+
+        def add_noise(x):
+            x["noisy"] = degradation.add_gaussian_noise(
+                x["image"],
+                self.noise_sigma,
+                degradation.example_seed(x["id"], self.seed),
+                quantize=self.quantize,
+            )
+            return x
+
+        return utils.parallel_map(
+            dataset,
+            add_noise,
+            read_config=read_config,
+            num_parallel_calls=self.num_parallel_calls,
+            deterministic=self.deterministic,
+        )
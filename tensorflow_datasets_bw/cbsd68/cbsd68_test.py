@@ -1,18 +1,71 @@
 """bsds500 dataset."""
 
+import tensorflow as tf
 import tensorflow_datasets as tfds
 from . import cbsd68
+from .. import degradation, testing
 
 
 class CBSD68(tfds.testing.DatasetBuilderTestCase):
     """Tests for bsds500 dataset."""
 
     DATASET_CLASS = cbsd68.Cbsd68
+    BUILDER_CONFIG_NAMES_TO_TEST = ["default", "noisy25"]
     SPLITS = {
         "test": 2,  # Number of fake test example
     }
     DL_EXTRACT_RESULT = "."
 
 
+class CBSD68NoiseTest(tfds.testing.TestCase):
+    """Tests for the noisy images synthesized when reading cbsd68."""
+
+    def load(self, config="default", **kwargs):
+        builder = cbsd68.Cbsd68(data_dir=self.tmp_dir, config=config, **kwargs)
+        testing.prepare_from_dummy_data(builder)
+        return list(tfds.as_numpy(builder.as_dataset(split="test")))
+
+    def test_noise_sigma(self):
+        examples = self.load(noise_sigma=25)
+        self.assertLen(examples, 2)
+        for example in examples:
+            noisy = example["noisy"]
+            self.assertEqual(noisy.dtype, tf.float32)
+            self.assertEqual(noisy.shape, example["image"].shape)
+            expected = degradation.add_gaussian_noise(
+                example["image"], 25, degradation.example_seed(example["id"], 0)
+            )
+            self.assertAllClose(noisy, expected)
+            self.assertAllClose(
+                tf.math.reduce_std(noisy - example["image"]), 25, rtol=0.1
+            )
+
+        # The noise is reproducible
+        for example, other in zip(examples, self.load(noise_sigma=25)):
+            self.assertAllEqual(example["noisy"], other["noisy"])
+
+    def test_seed(self):
+        examples = self.load(noise_sigma=25, seed=0)
+        for example, other in zip(examples, self.load(noise_sigma=25, seed=1)):
+            self.assertAllEqual(example["image"], other["image"])
+            self.assertNotAllClose(example["noisy"], other["noisy"])
+
+    def test_quantize(self):
+        examples = self.load(noise_sigma=25, quantize=True)
+        for example in examples:
+            self.assertEqual(example["noisy"].dtype, tf.uint8)
+            expected = degradation.add_gaussian_noise(
+                example["image"],
+                25,
+                degradation.example_seed(example["id"], 0),
+                quantize=True,
+            )
+            self.assertAllEqual(example["noisy"], expected)
+
+    def test_noisy_config_rejects_noise_sigma(self):
+        with self.assertRaisesRegex(ValueError, "noise_sigma"):
+            self.load(config="noisy25", noise_sigma=25)
+
+
 if __name__ == "__main__":
     tfds.testing.test_main()
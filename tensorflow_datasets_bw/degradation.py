@@ -0,0 +1,379 @@
+"""Reproducible image degradations which can be applied when reading a dataset.
+
+The random degradations use stateless random ops seeded with a seed derived from the
+key of the example. Therefore, the degraded image of an example is the same in every
+run and does not depend on the order, the batching or the parallelism of the input
+pipeline.
+"""
+import collections
+import threading
+from typing import Hashable, Optional, Tuple, Union
+
+import tensorflow as tf
+
+
+def example_seed(key: Union[str, tf.Tensor], seed: int = 0) -> tf.Tensor:
+    """Derive the seed of a stateless random op from the key of an example.
+
+    Args:
+        key: The key (or a batch of keys) of the example as a string.
+        seed: A global seed which is combined with the key.
+
+    Returns:
+        The seed [..., 2] of type int64.
+    """
+    key_hash = tf.strings.to_hash_bucket_fast(key, 2**63 - 1)
+    return tf.stack([tf.ones_like(key_hash) * seed, key_hash], axis=-1)
+
+
+def add_gaussian_noise(
+    image: tf.Tensor,
+    sigma: Union[float, tf.Tensor],
+    seed: tf.Tensor,
+    quantize: bool = False,
+) -> tf.Tensor:
+    """Add white Gaussian noise to an image or a batch of images.
+
+    Args:
+        image: The image [H, W, C] or a batch of images [B, H, W, C] with values in the
+            range [0, 255].
+        sigma: The standard deviation of the noise relative to the range [0, 255].
+        seed: The seed [2] for an image or the seeds [B, 2] for a batch of images (see
+            `example_seed`). The noise of an image only depends on its seed.
+        quantize: If the noisy image should be rounded, clipped and cast to uint8 like
+            noisy images stored as PNG.
+
+    Returns:
+        The noisy image(s) of type float32 or uint8 if `quantize` is True.
+    """
+    image = tf.cast(image, tf.float32)
+    seed = tf.convert_to_tensor(seed)
+
+    def noise(s):
+        return tf.random.stateless_normal(tf.shape(image)[-3:], seed=s)
+
+    if seed.shape.rank == 1:
+        noisy = image + sigma * noise(seed)
+    else:
+        noisy = image + sigma * tf.vectorized_map(noise, seed)
+
+    if quantize:
+        noisy = tf.cast(tf.clip_by_value(tf.round(noisy), 0, 255), tf.uint8)
+    return noisy
+
+
+def center_kernel(
+    kernel: tf.Tensor, size: tf.Tensor, canvas_shape: Tuple[int, int]
+) -> tf.Tensor:
+    """Crop a zero-padded kernel to its size and center it on a larger canvas.
+
+    The center of a kernel of size [h, w] is at (h // 2, w // 2). It is moved to the
+    center (KH // 2, KW // 2) of the canvas. Therefore, kernels of different sizes can
+    be batched without shifting the blurred images.
+
+    Args:
+        kernel: The kernel [h', w'] with h' >= h and w' >= w (e.g. from
+            'schelten_kernels').
+        size: The size [2] of the kernel.
+        canvas_shape: The shape (KH, KW) of the canvas with KH >= h and KW >= w.
+
+    Returns:
+        The kernel on the canvas [KH, KW].
+    """
+    h, w = size[0], size[1]
+    kernel = kernel[:h, :w]
+    top = canvas_shape[0] // 2 - h // 2
+    left = canvas_shape[1] // 2 - w // 2
+    kernel = tf.pad(
+        kernel,
+        [[top, canvas_shape[0] - h - top], [left, canvas_shape[1] - w - left]],
+    )
+    return tf.ensure_shape(kernel, canvas_shape)
+
+
+def psf2otf(kernel: tf.Tensor, shape: Tuple[int, int]) -> tf.Tensor:
+    """Compute the optical transfer function of a kernel (like MATLAB's `psf2otf`).
+
+    The kernel is zero-padded to the image shape and circularly shifted such that its
+    center (h // 2, w // 2) is at the origin before the FFT is computed.
+
+    Args:
+        kernel: The kernel [h, w] or a batch of kernels [B, h, w].
+        shape: The shape (H, W) of the images.
+
+    Returns:
+        The OTF [..., H, W // 2 + 1] of type complex64 computed with `rfft2d`.
+    """
+    kernel = tf.cast(kernel, tf.float32)
+    kernel_shape = tf.shape(kernel)[-2:]
+    paddings = tf.concat(
+        [
+            tf.zeros([tf.rank(kernel) - 2, 2], tf.int32),
+            tf.stack([tf.zeros([2], tf.int32), shape - kernel_shape], axis=-1),
+        ],
+        axis=0,
+    )
+    kernel = tf.pad(kernel, paddings)
+    kernel = tf.roll(kernel, shift=-(kernel_shape // 2), axis=[-2, -1])
+    return tf.signal.rfft2d(kernel)
+
+
+class OtfCache:
+    """LRU cache for the OTFs of kernels keyed by the kernel id and the image shape.
+
+    Iterative non-blind deconvolution methods need the OTF of the same kernel many
+    times (and for different image shapes, e.g. the two orientations of the BSDS500
+    images). The cache computes each OTF once with `psf2otf`. The least recently used
+    OTFs are evicted if the cached OTFs need more than `max_bytes`.
+
+    Usage with 'schelten_kernels' in eager mode:
+
+        cache = OtfCache()
+        for kernel_id, x in enumerate(kernels):
+            otf = cache.get(kernel_id, x["kernel"], image_shape, size=x["size"])
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._num_bytes = 0
+        self._otfs: collections.OrderedDict[
+            Tuple[Hashable, Tuple[int, int]], tf.Tensor
+        ] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def num_bytes(self) -> int:
+        """The number of bytes of the cached OTFs."""
+        return self._num_bytes
+
+    def get(
+        self,
+        kernel_id: Hashable,
+        kernel: tf.Tensor,
+        shape: Tuple[int, int],
+        size: Optional[tf.Tensor] = None,
+    ) -> tf.Tensor:
+        """Get the OTF of a kernel for images of the given shape.
+
+        Args:
+            kernel_id: An id which identifies the kernel (e.g. the index in the kernel
+                dataset).
+            kernel: The kernel [h, w]. Only used if the OTF is not cached.
+            shape: The shape (H, W) of the images.
+            size: The size [2] of the kernel if it is zero-padded (see
+                `utils.crop_kernel_to_size`).
+
+        Returns:
+            The OTF [H, W // 2 + 1] of type complex64 (see `psf2otf`).
+        """
+        key = (kernel_id, (int(shape[0]), int(shape[1])))
+        with self._lock:
+            if key in self._otfs:
+                self.hits += 1
+                self._otfs.move_to_end(key)
+                return self._otfs[key]
+
+        if size is not None:
+            kernel = kernel[: size[0], : size[1]]
+        otf = psf2otf(kernel, key[1])
+        num_bytes = otf.shape.num_elements() * otf.dtype.size
+
+        with self._lock:
+            self.misses += 1
+            if key not in self._otfs:
+                self._otfs[key] = otf
+                self._num_bytes += num_bytes
+            while self._num_bytes > self.max_bytes and len(self._otfs) > 1:
+                _, evicted = self._otfs.popitem(last=False)
+                self._num_bytes -= evicted.shape.num_elements() * evicted.dtype.size
+        return otf
+
+    def clear(self) -> None:
+        """Remove all cached OTFs."""
+        with self._lock:
+            self._otfs.clear()
+            self._num_bytes = 0
+
+
+def fft_convolve(
+    images: tf.Tensor, kernels: tf.Tensor, boundary: str = "valid"
+) -> tf.Tensor:
+    """Convolve images with kernels using the FFT.
+
+    Args:
+        images: The image [H, W, C] or a batch of images [B, H, W, C].
+        kernels: The kernel [KH, KW] or a batch of kernels [B, KH, KW] (the center is at
+            (KH // 2, KW // 2), see `center_kernel`).
+        boundary: How the boundary is handled:
+            "valid": Only the pixels not depending on the boundary are returned. The
+                result has the shape [..., H - KH + 1, W - KW + 1, C].
+            "circular": The image is assumed to be periodic.
+            "reflect": The image is reflected at the boundary (without repeating the
+                border pixels).
+
+    Returns:
+        The blurred images of type float32.
+    """
+    if boundary not in ["valid", "circular", "reflect"]:
+        raise ValueError(
+            f"Unknown boundary '{boundary}'. Use 'valid', 'circular' or 'reflect'."
+        )
+    images = tf.cast(images, tf.float32)
+    kernel_shape = tf.shape(kernels)[-2:]
+    center = kernel_shape // 2
+    image_shape = tf.shape(images)[-3:-1]
+
+    if boundary == "reflect":
+        # Pad such that the pixels of the image are not affected by the circular
+        # boundary of the FFT
+        pad_before = kernel_shape - 1 - center
+        paddings = tf.concat(
+            [
+                tf.zeros([tf.rank(images) - 3, 2], tf.int32),
+                tf.stack([pad_before, center], axis=-1),
+                [[0, 0]],
+            ],
+            axis=0,
+        )
+        images = tf.pad(images, paddings, mode="REFLECT")
+
+    # Channels first because the FFT is computed on the two inner-most dimensions
+    channels_first = tf.experimental.numpy.moveaxis(images, -1, -3)
+    fft_shape = tf.shape(channels_first)[-2:]
+    otf = psf2otf(kernels, fft_shape)[..., None, :, :]
+    blurred = tf.signal.irfft2d(
+        tf.signal.rfft2d(channels_first) * otf, fft_length=fft_shape
+    )
+    blurred = tf.experimental.numpy.moveaxis(blurred, -3, -1)
+
+    if boundary == "reflect":
+        return blurred[
+            ...,
+            pad_before[0] : pad_before[0] + image_shape[0],
+            pad_before[1] : pad_before[1] + image_shape[1],
+            :,
+        ]
+    if boundary == "valid":
+        return crop_valid(blurred, kernel_shape)
+    return blurred
+
+
+def crop_valid(blurred: tf.Tensor, kernel_size: tf.Tensor) -> tf.Tensor:
+    """Crop an image convolved with circular boundary to the valid region.
+
+    Args:
+        blurred: The blurred image [..., H, W, C].
+        kernel_size: The size [2] of the centered kernel which was used.
+
+    Returns:
+        The valid region [..., H - h + 1, W - w + 1, C] of the image.
+    """
+    image_shape = tf.shape(blurred)[-3:-1]
+    top_left = kernel_size - 1 - kernel_size // 2
+    bottom_right = top_left + image_shape - kernel_size + 1
+    return blurred[
+        ...,
+        top_left[0] : bottom_right[0],
+        top_left[1] : bottom_right[1],
+        :,
+    ]
+
+
+def blur_dataset(
+    images: tf.data.Dataset,
+    kernels: tf.data.Dataset,
+    boundary: str = "valid",
+    noise_sigma: Optional[float] = None,
+    seed: int = 0,
+    batch_size: int = 8,
+    canvas_shape: Optional[Tuple[int, int]] = None,
+    num_parallel_calls: Optional[int] = tf.data.AUTOTUNE,
+) -> tf.data.Dataset:
+    """Create a dataset of blurred images from a dataset of images and kernels.
+
+    Every image is blurred with every kernel (e.g. the 'dmsp' configs of 'bsds500' and
+    'schelten_kernels'). The pairs are batched by image shape and convolved with
+    `fft_convolve`. For the "valid" boundary each blurred image is cropped according to
+    the size of its kernel.
+
+    Args:
+        images: A dataset with the images [H, W, C] for the key "image".
+        kernels: A dataset with the kernels for the key "kernel" and their sizes for
+            the key "size" (e.g. 'schelten_kernels').
+        boundary: The boundary handling ("valid", "circular" or "reflect").
+        noise_sigma: The standard deviation of white Gaussian noise added to the blurred
+            images (relative to the range [0, 255]). No noise is added if None.
+        seed: The global seed for the noise. The noise of a pair is seeded by the
+            global seed and the index of the pair.
+        batch_size: The number of pairs which are convolved together.
+        canvas_shape: The shape (KH, KW) all kernels are centered on. Defaults to the
+            static shape of the kernels (the padded shape for 'schelten_kernels').
+        num_parallel_calls: The number of batches which are processed in parallel.
+
+    Returns:
+        A dataset with the blurred images for the key "blurred" (float32), the sharp
+        images for the key "image" and the kernels (float32) cropped to their size for
+        the key "kernel". The order of the elements depends on the batching.
+    """
+    if canvas_shape is None:
+        kernel_shape = tf.TensorShape(kernels.element_spec["kernel"].shape)
+        if not kernel_shape.is_fully_defined():
+            raise ValueError(
+                "The kernels have no static shape. Set `canvas_shape` to the maximum "
+                + "size of the kernels."
+            )
+        canvas_shape = (kernel_shape[0], kernel_shape[1])
+
+    kernels = kernels.map(lambda x: {"kernel": x["kernel"], "size": x["size"]}).cache()
+
+    def pair_with_kernels(x):
+        return kernels.map(lambda k: {"image": x["image"], **k})
+
+    def prepare(index, x):
+        return {
+            "image": x["image"],
+            "size": x["size"],
+            "kernel": center_kernel(
+                tf.cast(x["kernel"], tf.float32), x["size"], canvas_shape
+            ),
+            "seed": example_seed(tf.strings.as_string(index), seed),
+        }
+
+    def blur_batch(x):
+        blurred = fft_convolve(
+            x["image"],
+            x["kernel"],
+            boundary="circular" if boundary == "valid" else boundary,
+        )
+        if noise_sigma is not None:
+            blurred = add_gaussian_noise(blurred, noise_sigma, x["seed"])
+        return {**x, "blurred": blurred}
+
+    def finalize(x):
+        h, w = x["size"][0], x["size"][1]
+        top = canvas_shape[0] // 2 - h // 2
+        left = canvas_shape[1] // 2 - w // 2
+        blurred = x["blurred"]
+        if boundary == "valid":
+            blurred = crop_valid(blurred, x["size"])
+        return {
+            "blurred": blurred,
+            "image": x["image"],
+            "kernel": x["kernel"][top : top + h, left : left + w],
+        }
+
+    def shape_key(x):
+        shape = tf.shape(x["image"], out_type=tf.int64)
+        return shape[0] * 2**20 + shape[1]
+
+    pairs = images.flat_map(pair_with_kernels).enumerate().map(prepare)
+    # Only images with the same shape can be batched
+    batches = pairs.group_by_window(
+        key_func=shape_key,
+        reduce_func=lambda _, window: window.batch(batch_size),
+        window_size=batch_size,
+    )
+    blurred = batches.map(blur_batch, num_parallel_calls=num_parallel_calls)
+    return blurred.unbatch().map(finalize)
@@ -0,0 +1,115 @@
+"""Tests for the reproducible degradations."""
+
+import numpy as np
+import scipy.signal
+import tensorflow as tf
+import tensorflow_datasets as tfds
+
+from . import degradation
+
+
+class DegradationTest(tfds.testing.TestCase):
+    """Tests for degradation."""
+
+    def test_example_seed(self):
+        seeds = degradation.example_seed(["a", "b"], seed=3)
+        self.assertEqual(seeds.shape, (2, 2))
+        self.assertAllEqual(seeds[:, 0], [3, 3])
+        self.assertAllEqual(seeds[0], degradation.example_seed("a", seed=3))
+        self.assertNotAllEqual(seeds[0], seeds[1])
+
+    def test_add_gaussian_noise_batched(self):
+        images = tf.zeros((3, 8, 6, 3), dtype=tf.uint8)
+        seeds = degradation.example_seed(["0", "1", "2"])
+        batched = degradation.add_gaussian_noise(images, 25, seeds)
+        for image, seed, noisy in zip(images, seeds, batched):
+            self.assertAllEqual(
+                degradation.add_gaussian_noise(image, 25, seed), noisy
+            )
+        np.testing.assert_allclose(np.std(batched), 25, rtol=0.2)
+
+    def test_add_gaussian_noise_quantize(self):
+        image = tf.fill((8, 6, 3), tf.constant(128, tf.uint8))
+        seed = degradation.example_seed("0")
+        noisy = degradation.add_gaussian_noise(image, 10, seed, quantize=True)
+        self.assertEqual(noisy.dtype, tf.uint8)
+        self.assertAllEqual(
+            noisy,
+            tf.cast(
+                tf.round(degradation.add_gaussian_noise(image, 10, seed)), tf.uint8
+            ),
+        )
+
+    def test_fft_convolve(self):
+        rng = np.random.default_rng(0)
+        image = rng.random((20, 17, 3)).astype(np.float32)
+        kernel = rng.random((4, 5)).astype(np.float32)
+        pad = ((1, 2), (2, 2), (0, 0))  # (h - 1 - h // 2, h // 2), ...
+        boundaries = [("valid", None), ("circular", "wrap"), ("reflect", "reflect")]
+        for boundary, mode in boundaries:
+            padded = image if mode is None else np.pad(image, pad, mode=mode)
+            expected = np.stack(
+                [
+                    scipy.signal.convolve2d(padded[..., c], kernel, mode="valid")
+                    for c in range(3)
+                ],
+                axis=-1,
+            )
+            blurred = degradation.fft_convolve(image, kernel, boundary=boundary)
+            self.assertAllClose(blurred, expected, atol=1e-4)
+
+    def test_blur_dataset(self):
+        rng = np.random.default_rng(0)
+        images = [
+            rng.integers(0, 255, shape).astype(np.uint8)
+            for shape in [(20, 17, 3), (17, 20, 3), (20, 17, 3)]
+        ]
+        kernels = [rng.random((5, 3)), rng.random((3, 7))]
+        images_ds = tf.data.Dataset.from_generator(
+            lambda: ({"image": image} for image in images),
+            output_signature={"image": tf.TensorSpec((None, None, 3), tf.uint8)},
+        )
+        kernels_ds = tf.data.Dataset.from_tensor_slices(
+            {
+                "kernel": np.stack(
+                    [
+                        np.pad(k, [(0, 9 - k.shape[0]), (0, 9 - k.shape[1])])
+                        for k in kernels
+                    ]
+                ),
+                "size": np.array([k.shape for k in kernels], dtype=np.int32),
+            }
+        )
+        blurred = list(
+            tfds.as_numpy(degradation.blur_dataset(images_ds, kernels_ds, batch_size=2))
+        )
+        self.assertLen(blurred, 6)
+        for x in blurred:
+            kernel = [k for k in kernels if k.shape == x["kernel"].shape][0]
+            self.assertAllClose(x["kernel"], kernel)
+            self.assertAllClose(
+                x["blurred"], degradation.fft_convolve(x["image"], kernel), atol=1e-3
+            )
+
+    def test_otf_cache(self):
+        kernel = tf.pad(tf.ones((3, 5)) / 15, [[0, 2], [0, 1]])
+        size = tf.constant([3, 5])
+        otf_bytes = 20 * 9 * 8  # [20, 16 // 2 + 1] complex64
+        cache = degradation.OtfCache(max_bytes=2 * otf_bytes)
+
+        otf = cache.get(0, kernel, (20, 16), size=size)
+        self.assertAllClose(otf, degradation.psf2otf(kernel[:3, :5], (20, 16)))
+        cache.get(1, kernel, (20, 16), size=size)
+        self.assertIs(cache.get(0, kernel, (20, 16), size=size), otf)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+        # Evicts the least recently used OTF (kernel 1)
+        cache.get(0, kernel, (16, 20), size=size)
+        self.assertEqual(cache.num_bytes, otf_bytes + 16 * 11 * 8)
+        cache.get(0, kernel, (20, 16), size=size)
+        cache.get(1, kernel, (20, 16), size=size)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+
+if __name__ == "__main__":
+    tfds.testing.test_main()
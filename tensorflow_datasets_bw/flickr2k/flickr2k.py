@@ -2,71 +2,236 @@
 
 import os
 import glob
+from typing import Optional
 
+import numpy as np
+import tensorflow as tf
 import tensorflow_datasets as tfds
 
+from .. import parallel, super_resolution
+
 _DESCRIPTION = """
-The Flickr2K dataset was collected using the Flickr API. It contains 2650 images. Each image is
-available in high resolution, low resolution with bicubic downsampling and low resolution with
-unknown downsampling. Downsamling factors are 2x, 3x and 4x.
+The Flickr2K dataset was collected using the Flickr API. It contains 2650 images. Each
+image is available in high resolution, low resolution with bicubic downsampling and low
+resolution with unknown downsampling. Downsamling factors are 2x, 3x and 4x.
 
-In the current release the dataset only provides the high resolution images.
+The 'default' config only provides the high resolution images. The 'bicubic_*' and
+'unknown_*' configs additionally provide the low resolution images of the dataset in the
+same example. The 'patches_*' configs provide aligned pairs of high and low resolution
+patches for training. The patches are extracted on a regular grid when building the
+dataset such that reading a patch does not require decoding the full 2K image.
 
 The dataset only consists of a 'train' split.
 """
 
 _CITATION = """
 @InProceedings{Lim_2017_CVPR_Workshops,
-  author = {Lim, Bee and Son, Sanghyun and Kim, Heewon and Nah, Seungjun and Lee, Kyoung Mu},
+  author = {Lim, Bee and Son, Sanghyun and Kim, Heewon and Nah, Seungjun and
+            Lee, Kyoung Mu},
   title = {Enhanced Deep Residual Networks for Single Image Super-Resolution},
-  booktitle = {The IEEE Conference on Computer Vision and Pattern Recognition (CVPR) Workshops},
+  booktitle = {The IEEE Conference on Computer Vision and Pattern Recognition (CVPR)
+               Workshops},
   month = {July},
   year = {2017}
 }
 """
 
-# TODO add LR features
+
+class Flickr2kConfig(super_resolution.SuperResolutionConfig):
+    """BuilderConfig for Flickr2k.
+
+    If `lr_track` is set, the low resolution images of this track ("bicubic" or
+    "unknown") with the downsampling factor `scale` are stored with the high resolution
+    images. If `patch_size` is set, the images are downsampled by `scale` and each
+    example is a pair of aligned patches with `patch_size` x `patch_size` low
+    resolution pixels.
+    """
+
+    def __init__(
+        self,
+        lr_track: Optional[str] = None,
+        patch_size: Optional[int] = None,
+        patch_stride: Optional[int] = None,
+        **kwargs,
+    ):
+        super(Flickr2kConfig, self).__init__(**kwargs)
+        self.lr_track = lr_track
+        self.patch_size = patch_size
+        # Distance between the patches in the low resolution image
+        self.patch_stride = patch_stride or patch_size
+
+    @property
+    def patches(self) -> bool:
+        """If the examples are patches."""
+        return self.patch_size is not None
+
+
+def _lr_track_config(lr_track: str, scale: int) -> Flickr2kConfig:
+    return Flickr2kConfig(
+        name=f"{lr_track}_x{scale}",
+        description=(
+            f"The high resolution images and the low resolution images with {lr_track} "
+            f"downsampling by a factor of {scale}."
+        ),
+        lr_track=lr_track,
+        scale=scale,
+    )
+
+
+def _patches_config(scale: int) -> Flickr2kConfig:
+    return Flickr2kConfig(
+        name=f"patches_bicubic_x{scale}",
+        description=(
+            f"Non-overlapping patch pairs of 48x48 low resolution pixels with bicubic "
+            f"downsampling by a factor of {scale}."
+        ),
+        scale=scale,
+        patch_size=48,
+    )
 
 
 class Flickr2k(tfds.core.GeneratorBasedBuilder):
     """DatasetBuilder for flickr2k dataset."""
 
-    VERSION = tfds.core.Version("0.0.1")
+    VERSION = tfds.core.Version("0.2.0")
     RELEASE_NOTES = {
         "0.0.1": "Alpha release.",
+        "0.1.0": "Add configs with aligned high and low resolution patches.",
+        "0.2.0": "Add configs with the low resolution images of the dataset.",
     }
 
+    BUILDER_CONFIGS = [
+        Flickr2kConfig(
+            name="default",
+            description="The high resolution images.",
+        ),
+        *[
+            _lr_track_config(lr_track, scale)
+            for lr_track in ["bicubic", "unknown"]
+            for scale in [2, 3, 4]
+        ],
+        _patches_config(2),
+        _patches_config(3),
+        _patches_config(4),
+    ]
+
     MANUAL_DOWNLOAD_INSTRUCTIONS = """\
-    manual_dir (usually `~/tensorflow_datasets/downloads/manual`) should contain the folder
-    'Flickr2K' download and extract the dataset from
+    manual_dir (usually `~/tensorflow_datasets/downloads/manual`) should contain the
+    folder 'Flickr2K' download and extract the dataset from
     https://cv.snu.ac.kr/research/EDSR/Flickr2K.tar.
       """
 
+    def __init__(
+        self, data_dir=None, config=None, version=None, use_beam: bool = False
+    ) -> None:
+        super(Flickr2k, self).__init__(
+            data_dir=data_dir, config=config, version=version
+        )
+        # Generate the dataset with Apache Beam (configure the runner with
+        # `tfds.download.DownloadConfig(beam_runner=..., beam_options=...)`)
+        self.use_beam = use_beam
+
     def _info(self) -> tfds.core.DatasetInfo:
         """Returns the dataset metadata."""
+        config = self.builder_config
+        if config.patches:
+            lr_size = config.patch_size
+            hr_size = lr_size * config.scale
+            features = {
+                "hr": tfds.features.Image(shape=(hr_size, hr_size, 3)),
+                "lr": tfds.features.Image(shape=(lr_size, lr_size, 3)),
+                "image": tfds.features.Text(),
+                # Position (row, column) of the patch in the low resolution image
+                "position": tfds.features.Tensor(shape=(2,), dtype=tf.int32),
+            }
+        else:
+            features = {
+                "hr": tfds.features.Image(shape=(None, None, 3)),
+            }
+            if config.lr_track is not None:
+                features["lr"] = tfds.features.Image(shape=(None, None, 3))
         return tfds.core.DatasetInfo(
             builder=self,
             description=_DESCRIPTION,
-            features=tfds.features.FeaturesDict(
-                {
-                    "hr": tfds.features.Image(shape=(None, None, 3)),
-                }
-            ),
+            features=tfds.features.FeaturesDict(features),
             homepage="https://github.com/limbee/NTIRE2017",
             citation=_CITATION,
         )
 
     def _split_generators(self, dl_manager: tfds.download.DownloadManager):
         """Returns SplitGenerators."""
-        data_path = os.path.join(dl_manager.manual_dir, "Flickr2K", "Flickr2K_HR")
+        data_path = os.path.join(dl_manager.manual_dir, "Flickr2K")
 
+        if self.use_beam:
+            return {
+                "train": self._build_pcollection(data_path),
+            }
         return {
             "train": self._generate_examples(data_path),
         }
 
     def _generate_examples(self, path):
         """Yields examples."""
-        files = glob.glob(os.path.join(path, "*.png"))
-        keys = [os.path.basename(n)[:-4] for n in files]
-        for key, file in zip(keys, files):
-            yield key, {"hr": file}
+        config = self.builder_config
+        for key, files in _list_files(path, config):
+            if config.patches:
+                yield from _load_patches(key, files, config)
+            else:
+                yield key, _load_example(files)
+
+    def _build_pcollection(self, path):
+        """Returns a Beam transform which generates the examples."""
+        config = self.builder_config
+        if config.patches:
+            return parallel.beam_generate_example_groups(
+                [(key, (files, config)) for key, files in _list_files(path, config)],
+                _load_patches_item,
+            )
+        return parallel.beam_generate_examples(
+            _list_files(path, config), _load_example
+        )
+
+
+def _list_files(path, config: Flickr2kConfig):
+    """Returns the tuples of key and the paths of the images of an example."""
+    hr_files = glob.glob(os.path.join(path, "Flickr2K_HR", "*.png"))
+    items = []
+    for hr_file in hr_files:
+        key = os.path.basename(hr_file)[:-4]
+        files = {"hr": hr_file}
+        if config.lr_track is not None:
+            files["lr"] = os.path.join(
+                path,
+                f"Flickr2K_LR_{config.lr_track}",
+                f"X{config.scale}",
+                f"{key}x{config.scale}.png",
+            )
+        items.append((key, files))
+    return items
+
+
+def _load_example(files):
+    # The image features read the files
+    return dict(files)
+
+
+def _load_patches(key, files, config: Flickr2kConfig):
+    """Yields the tuples of key and example for the patches of one image."""
+    if config.patch_size is None:
+        raise ValueError(f"The config '{config.name}' does not define patches.")
+    image = tf.io.decode_png(tf.io.read_file(files["hr"]), channels=3)
+    example = super_resolution.downsample_example(image, config)
+    patches = super_resolution.extract_patches(
+        example["hr"], example["lr"], config.patch_size, config.patch_stride
+    )
+    for (y, x), hr, lr in patches:
+        yield f"{key}_{y:04d}_{x:04d}", {
+            "hr": hr,
+            "lr": lr,
+            "image": key,
+            "position": np.array([y, x], dtype=np.int32),
+        }
+
+
+def _load_patches_item(key, item):
+    return _load_patches(key, *item)
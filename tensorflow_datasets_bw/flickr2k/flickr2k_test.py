@@ -2,17 +2,49 @@
 
 import tensorflow_datasets as tfds
 from . import flickr2k
+from .. import testing
 
 
 class Flickr2kTest(tfds.testing.DatasetBuilderTestCase):
     """Tests for flickr2k dataset."""
 
     DATASET_CLASS = flickr2k.Flickr2k
+    BUILDER_CONFIG_NAMES_TO_TEST = ["default", "bicubic_x4", "unknown_x4"]
     SPLITS = {
         "train": 3,  # Number of fake train example
     }
     DL_EXTRACT_RESULT = "Flickr2k"
 
 
+class Flickr2kPatchesTest(tfds.testing.DatasetBuilderTestCase):
+    """Tests for flickr2k dataset with patch pairs."""
+
+    DATASET_CLASS = flickr2k.Flickr2k
+    BUILDER_CONFIG_NAMES_TO_TEST = ["patches_bicubic_x4"]
+    SPLITS = {
+        "train": 5,  # Number of fake train patches
+    }
+    DL_EXTRACT_RESULT = "Flickr2k"
+
+
+class Flickr2kBeamTest(tfds.testing.TestCase):
+    """Tests for generating the flickr2k dataset with Apache Beam."""
+
+    def test_beam_matches_generator(self):
+        testing.assert_beam_matches_generator(
+            self, flickr2k.Flickr2k, self.tmp_dir, "train", 3, config="bicubic_x4"
+        )
+
+    def test_beam_patches_match_generator(self):
+        testing.assert_beam_matches_generator(
+            self,
+            flickr2k.Flickr2k,
+            self.tmp_dir,
+            "train",
+            5,
+            config="patches_bicubic_x4",
+        )
+
+
 if __name__ == "__main__":
     tfds.testing.test_main()
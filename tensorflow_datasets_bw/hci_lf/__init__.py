@@ -1,3 +1,3 @@
 """hci_lf dataset."""
 
-from .hci_lf import HciLf
+from .hci_lf import HciLf, decode_views  # noqa: F401
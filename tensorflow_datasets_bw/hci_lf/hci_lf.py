@@ -3,12 +3,16 @@
 import os
 import re
 import configparser
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import imageio
 import tensorflow as tf
 import tensorflow_datasets as tfds
 
+from .. import array_store, random_access, super_resolution, utils
+
 _DESCRIPTION = """
 Data of the 4D Light Field Benchmark.
 
@@ -17,6 +21,28 @@ The dataset consists of
 * 4 Test Scenes: `tfds.load("hci_lf", split="test")`
 * 4 Training Scenes: `tfds.load("hci_lf", split="train")`
 * 12 Additional Scenes: `tfds.load("hci_lf", split="validation")`
+
+The configs "simulated_png" and "stratified_png" store each view as a PNG encoded image
+instead of the raw light field tensor which reduces the size of the dataset on disk.
+
+The configs "simulated_patches" and "stratified_patches" store spatial tiles of 32x32
+pixels of all 81 views with the matching crops of the depth and disparity maps (e.g. to
+train disparity estimation). The tiles are extracted when building the dataset such
+that reading a patch only parses the patch.
+
+For interactive analysis, `HciLf(config="simulated").export_array_store(directory,
+manual_dir)` writes the scenes into chunked memory-mapped arrays on the local disk which
+allow reading arbitrary crops and views without reading whole records (see
+`array_store.ArrayStore`).
+
+Use the builder argument `views` (e.g. `"center"`, `"cross"`, `"grid:5x5"` or a list of
+(i, j) positions) to load only a subset of the views. For the PNG configs only the
+selected views are decoded.
+
+Use the builder argument `scale` (and `resize_method`, `antialias`) for light field
+super-resolution. The examples then contain the low resolution light field `lf_lr` and
+the high resolution light field `lf_hr` instead of `lf`. The depth and disparity maps
+are cropped like the high resolution views.
 """
 
 _CITATION = """
@@ -31,13 +57,129 @@ _CITATION = """
 """
 
 
+# The shape of the light fields
+GRID_SHAPE = (9, 9)
+VIEW_SHAPE = (512, 512, 3)
+
+
 class HciLfConfig(tfds.core.BuilderConfig):
-    def __init__(self, stratified=False, **kwargs):
+    def __init__(
+        self,
+        stratified=False,
+        encoded_views=False,
+        patch_size: Optional[int] = None,
+        patch_stride: Optional[int] = None,
+        **kwargs,
+    ):
         super(HciLfConfig, self).__init__(version=tfds.core.Version("0.1.0"), **kwargs)
         self.stratified = stratified
+        self.encoded_views = encoded_views
+        # Size of the spatial patches (None to store the full light fields)
+        self.patch_size = patch_size
+        # Distance between the patches
+        self.patch_stride = patch_stride or patch_size
+
+    @property
+    def patches(self) -> bool:
+        """If the examples are spatial patches of the light fields."""
+        return self.patch_size is not None
+
+
+class LightFieldViews(tfds.features.FeatureConnector):
+    """FeatureConnector for light fields which stores each view as a PNG image.
+
+    During `_generate_examples`, the feature connector accepts a list of the views in
+    row-major order. Each view can be a path to a PNG image or a `np.ndarray`.
+
+    Output:
+        `tf.Tensor` of type `tf.uint8` and shape `[GH, GW, H, W, C]`.
+    """
+
+    def __init__(self, grid_shape, view_shape, *, doc=None):
+        super(LightFieldViews, self).__init__(doc=doc)
+        self._grid_shape = tuple(grid_shape)
+        self._view_shape = tuple(view_shape)
+
+    @property
+    def grid_shape(self):
+        return self._grid_shape
+
+    @property
+    def view_shape(self):
+        return self._view_shape
+
+    @property
+    def num_views(self) -> int:
+        return self._grid_shape[0] * self._grid_shape[1]
+
+    def get_tensor_info(self):
+        return tfds.features.TensorInfo(
+            shape=(*self._grid_shape, *self._view_shape), dtype=tf.uint8
+        )
+
+    def get_serialized_info(self):
+        return tfds.features.TensorInfo(shape=(self.num_views,), dtype=tf.string)
+
+    def encode_example(self, example_data):
+        if len(example_data) != self.num_views:
+            raise ValueError(
+                f"Expected {self.num_views} views but got {len(example_data)}."
+            )
+        return [self._encode_view(v) for v in example_data]
+
+    def _encode_view(self, view) -> bytes:
+        if isinstance(view, np.ndarray):
+            if view.shape != self._view_shape:
+                raise ValueError(
+                    f"Expected a view of shape {self._view_shape} but got {view.shape}."
+                )
+            return tf.io.encode_png(view).numpy()
+        with tf.io.gfile.GFile(view, "rb") as f:
+            return f.read()
+
+    def decode_example(self, tfexample_data):
+        views = self.decode_views(tfexample_data, list(range(self.num_views)))
+        return tf.reshape(views, (*self._grid_shape, *self._view_shape))
+
+    def decode_views(self, tfexample_data, idx):
+        """Decode only the views with the given indices in the flattened grid.
+
+        Returns:
+            The decoded views with the shape [N, H, W, C].
+        """
+        views = tf.map_fn(
+            lambda v: tf.io.decode_png(v, channels=self._view_shape[-1]),
+            tf.gather(tfexample_data, idx),
+            fn_output_signature=tf.uint8,
+        )
+        return tf.ensure_shape(views, (len(idx), *self._view_shape))
+
+    def to_json_content(self):
+        return {
+            "grid_shape": list(self._grid_shape),
+            "view_shape": list(self._view_shape),
+        }
+
+
+@tfds.decode.make_decoder(output_dtype=tf.uint8)
+def decode_views(serialized_views, feature, views):
+    """Decoder for a `LightFieldViews` feature which only decodes a subset of the views.
 
+    Example:
+        `tfds.load("hci_lf/simulated_png", decoders={"lf": decode_views("center")})`
 
-class HciLf(tfds.core.GeneratorBasedBuilder):
+    Args:
+        views: The selection of views. See `utils.lf_view_positions`.
+    """
+    positions, sub_grid = utils.lf_view_positions(views, feature.grid_shape)
+    idx = [utils.lf_batch_idx(feature.grid_shape, i, j) for i, j in positions]
+    selected = feature.decode_views(serialized_views, idx)
+    if sub_grid is None:
+        return selected
+    return tf.reshape(selected, (*sub_grid, *feature.view_shape))
+
+
+class HciLf(random_access.IndexedBuilderMixin, tfds.core.GeneratorBasedBuilder):
     """DatasetBuilder for hci_lf dataset."""
 
     BUILDER_CONFIGS = [
@@ -51,6 +193,30 @@ class HciLf(tfds.core.GeneratorBasedBuilder):
             description="Stratisfied light fields",
             stratified=True,
         ),
+        HciLfConfig(
+            name="simulated_png",
+            description="All simulated light fields with PNG encoded views",
+            stratified=False,
+            encoded_views=True,
+        ),
+        HciLfConfig(
+            name="stratified_png",
+            description="Stratisfied light fields with PNG encoded views",
+            stratified=True,
+            encoded_views=True,
+        ),
+        HciLfConfig(
+            name="simulated_patches",
+            description="Non-overlapping 32x32 patches of all simulated light fields",
+            stratified=False,
+            patch_size=32,
+        ),
+        HciLfConfig(
+            name="stratified_patches",
+            description="Non-overlapping 32x32 patches of the stratisfied light fields",
+            stratified=True,
+            patch_size=32,
+        ),
     ]
 
     MANUAL_DOWNLOAD_INSTRUCTIONS = """\
@@ -63,22 +229,64 @@ class HciLf(tfds.core.GeneratorBasedBuilder):
     Request the dataset from https://lightfield-analysis.uni-konstanz.de/ and extract it.
     """
 
+    def __init__(
+        self,
+        data_dir=None,
+        config=None,
+        version=None,
+        views: Optional[Union[str, List[Tuple[int, int]]]] = None,
+        num_decode_threads: Optional[int] = None,
+        scale: Optional[int] = None,
+        resize_method: str = tf.image.ResizeMethod.BICUBIC,
+        antialias: bool = False,
+        num_parallel_calls: Optional[int] = tf.data.AUTOTUNE,
+        deterministic: Optional[bool] = None,
+    ) -> None:
+        super(HciLf, self).__init__(data_dir=data_dir, config=config, version=version)
+        self.views = views
+        # Number of threads to decode the views when generating the dataset
+        # (None for the default of ThreadPoolExecutor)
+        self.num_decode_threads = num_decode_threads
+        # Downsampling of the views for light field super-resolution (None to disable)
+        self.scale = scale
+        self.resize_method = resize_method
+        self.antialias = antialias
+        self.num_parallel_calls = num_parallel_calls
+        self.deterministic = deterministic
+
     def _info(self) -> tfds.core.DatasetInfo:
         """Returns the dataset metadata."""
+        config = self.builder_config
+        if config.patches:
+            size = (config.patch_size, config.patch_size)
+            features = {
+                "lf": tfds.features.Tensor(
+                    shape=(*GRID_SHAPE, *size, VIEW_SHAPE[-1]), dtype=tf.uint8
+                ),
+                "depth": tfds.features.Tensor(shape=size, dtype=tf.float32),
+                "disparity": tfds.features.Tensor(shape=size, dtype=tf.float32),
+                "scene": tfds.features.Text(),
+                # Position (row, column) of the patch in the views
+                "position": tfds.features.Tensor(shape=(2,), dtype=tf.int32),
+            }
+        else:
+            if config.encoded_views:
+                lf_feature = LightFieldViews(
+                    grid_shape=GRID_SHAPE, view_shape=VIEW_SHAPE
+                )
+            else:
+                lf_feature = tfds.features.Tensor(
+                    shape=(*GRID_SHAPE, *VIEW_SHAPE), dtype=tf.uint8
+                )
+            features = {
+                "lf": lf_feature,
+                "depth": tfds.features.Tensor(shape=(512, 512), dtype=tf.float32),
+                "disparity": tfds.features.Tensor(shape=(512, 512), dtype=tf.float32),
+            }
         return tfds.core.DatasetInfo(
             builder=self,
             description=_DESCRIPTION,
-            features=tfds.features.FeaturesDict(
-                {
-                    "lf": tfds.features.Tensor(
-                        shape=(9, 9, 512, 512, 3), dtype=tf.uint8
-                    ),
-                    "depth": tfds.features.Tensor(shape=(512, 512), dtype=tf.float32),
-                    "disparity": tfds.features.Tensor(
-                        shape=(512, 512), dtype=tf.float32
-                    ),
-                }
-            ),
+            features=tfds.features.FeaturesDict(features),
             homepage="https://lightfield-analysis.uni-konstanz.de/",
             citation=_CITATION,
         )
@@ -86,23 +294,80 @@ class HciLf(tfds.core.GeneratorBasedBuilder):
     def _split_generators(self, dl_manager: tfds.download.DownloadManager):
         """Returns SplitGenerators."""
         data_path = os.path.join(dl_manager.manual_dir, "hcilf")
+        return {
+            split: self._generate_examples(path)
+            for split, path in self._split_paths(data_path).items()
+        }
 
+    def _split_paths(self, data_path):
+        """Returns the directories of the scenes of each split."""
         if self.builder_config.stratified:
-            return {
-                "test": self._generate_examples(os.path.join(data_path, "stratified"))
-            }
+            return {"test": os.path.join(data_path, "stratified")}
 
         return {
-            "train": self._generate_examples(os.path.join(data_path, "training")),
-            "test": self._generate_examples(os.path.join(data_path, "test")),
-            "validation": self._generate_examples(
-                os.path.join(data_path, "additional")
-            ),
+            "train": os.path.join(data_path, "training"),
+            "test": os.path.join(data_path, "test"),
+            "validation": os.path.join(data_path, "additional"),
         }
 
+    def export_array_store(
+        self,
+        directory: str,
+        manual_dir: str,
+        splits: Optional[List[str]] = None,
+        chunk_shape: Tuple[int, int, int] = (1, 128, 128),
+    ) -> None:
+        """Export the light fields into a local store of chunked memory-mapped arrays.
+
+        Each scene is stored with the arrays
+        * "lf": A `array_store.ChunkedArray` with the views in row-major order
+          [GH x GW, H, W, C] (see `utils.lf_batch_idx`) in chunks over (view, y, x).
+        * "depth" and "disparity": Memory-mapped [H, W] arrays.
+
+        Read the store with `array_store.ArrayStore(directory)`. The dataset does not
+        need to be prepared.
+
+        Args:
+            directory: The output directory.
+            manual_dir: The directory containing the folder 'hcilf' (see
+                `MANUAL_DOWNLOAD_INSTRUCTIONS`).
+            splits: The splits to export. Defaults to all splits of the config.
+            chunk_shape: The number of views, rows and columns of a chunk.
+        """
+        config = self.builder_config
+        if config.encoded_views or config.patches:
+            raise ValueError(
+                f"The config '{config.name}' cannot be exported. Use 'simulated' or "
+                + "'stratified'."
+            )
+        split_paths = self._split_paths(os.path.join(manual_dir, "hcilf"))
+        scenes: Dict[str, List[str]] = {}
+        for split in splits or list(split_paths):
+            scenes[split] = []
+            for scene, example in self._generate_examples(split_paths[split]):
+                lf = example["lf"]
+                array_store.write_example(
+                    os.path.join(directory, split, scene),
+                    {
+                        "lf": lf.reshape((-1, *lf.shape[2:])),
+                        "depth": example["depth"],
+                        "disparity": example["disparity"],
+                    },
+                    chunk_shapes={"lf": chunk_shape},
+                )
+                scenes[split].append(scene)
+        array_store.write_metadata(
+            directory,
+            {
+                "dataset": self.name,
+                "config": config.name,
+                "grid_shape": list(GRID_SHAPE),
+                "splits": scenes,
+            },
+        )
+
     def _generate_examples(self, path):
         """Yields examples."""
-
         scenes = [n for n in tf.io.gfile.listdir(path) if n != "license.txt"]
         for scene in scenes:
             p = os.path.join(path, scene)
@@ -117,10 +382,11 @@ class HciLf(tfds.core.GeneratorBasedBuilder):
 
             # Read the light field views
             view_paths = sorted(tf.io.gfile.glob(os.path.join(p, "input_*.png")))
-            views = np.array([imageio.imread(v) for v in view_paths])
-            lf = np.reshape(
-                views, (num_cams_y, num_cams_x, views.shape[1], views.shape[2], 3)
-            )
+            if self.builder_config.encoded_views:
+                # The encoded images are copied without decoding them
+                lf = view_paths
+            else:
+                lf = self._read_views(view_paths, num_cams_y, num_cams_x)
 
             # Read the depth map
             depth_file = os.path.join(p, "gt_depth_lowres.pfm")
@@ -136,18 +402,107 @@ class HciLf(tfds.core.GeneratorBasedBuilder):
             else:
                 disp_map = np.zeros([512, 512], dtype=np.float32)
 
-            yield scene, {
-                "lf": lf,
-                "depth": depth_map,
-                "disparity": disp_map,
-            }
+            example = {"lf": lf, "depth": depth_map, "disparity": disp_map}
+            if self.builder_config.patches:
+                yield from self._extract_patches(scene, example)
+            else:
+                yield scene, example
+
+    def _extract_patches(self, scene, example):
+        """Yields the tuples of key and example for the spatial patches of a scene."""
+        size = self.builder_config.patch_size
+        stride = self.builder_config.patch_stride
+        height, width = example["disparity"].shape
+        for y in range(0, height - size + 1, stride):
+            for x in range(0, width - size + 1, stride):
+                yield f"{scene}_{y:03d}_{x:03d}", {
+                    "lf": example["lf"][:, :, y : y + size, x : x + size],
+                    "depth": example["depth"][y : y + size, x : x + size],
+                    "disparity": example["disparity"][y : y + size, x : x + size],
+                    "scene": scene,
+                    "position": np.array([y, x], dtype=np.int32),
+                }
+
+    def _read_views(self, view_paths, num_cams_y, num_cams_x):
+        """Decode the views concurrently into one light field array."""
+        if len(view_paths) != num_cams_y * num_cams_x:
+            raise ValueError(
+                f"Expected {num_cams_y * num_cams_x} views but found {len(view_paths)}."
+            )
+
+        # Allocate the light field with the shape of the first view
+        first_view = imageio.imread(view_paths[0])
+        lf = np.empty((num_cams_y, num_cams_x, *first_view.shape), first_view.dtype)
+        lf[0, 0] = first_view
+
+        def read_view(idx):
+            lf[divmod(idx, num_cams_x)] = imageio.imread(view_paths[idx])
+
+        with ThreadPoolExecutor(max_workers=self.num_decode_threads) as executor:
+            # Consume the results to raise exceptions of the workers
+            for _ in executor.map(read_view, range(1, len(view_paths))):
+                pass
+        return lf
+
+    def _as_dataset(
+        self, split="train", decoders=None, read_config=None, shuffle_files=False
+    ):
+        if self.views is not None and self.builder_config.encoded_views:
+            # Only decode the selected views
+            decoders = dict(decoders or {})
+            if "lf" in decoders:
+                raise ValueError("A decoder for 'lf' cannot be combined with 'views'.")
+            decoders["lf"] = decode_views(self.views)
+
+        dataset = super(HciLf, self)._as_dataset(
+            split=split,
+            decoders=decoders,
+            read_config=read_config,
+            shuffle_files=shuffle_files,
+        )
+
+        functions = []
+        if self.views is not None and not self.builder_config.encoded_views:
+            functions.append(
+                utils.map_on_dict_key(
+                    "lf", lambda lf: utils.lf_select_views(lf, self.views)
+                )
+            )
+        if self.scale is not None:
+            functions.append(self._downsample)
+        if not functions:
+            return dataset
+
+        return utils.parallel_map(
+            dataset,
+            utils.compose(*functions),
+            read_config=read_config,
+            num_parallel_calls=self.num_parallel_calls,
+            deterministic=self.deterministic,
+        )
+
+    def _downsample(self, x):
+        """Replace the light field by the high and low resolution light fields."""
+        lf_hr, lf_lr = super_resolution.downsample_lf(
+            x.pop("lf"),
+            scale=self.scale,
+            resize_method=self.resize_method,
+            antialias=self.antialias,
+        )
+        hr_size = tf.shape(lf_hr)[-3:-1]
+        x["depth"] = x["depth"][: hr_size[0], : hr_size[1]]
+        x["disparity"] = x["disparity"][: hr_size[0], : hr_size[1]]
+        return {"lf_lr": lf_lr, "lf_hr": lf_hr, **x}
 
 
 # Slightly adapted from https://gist.github.com/aminzabardast/cdddae35c367c611b6fd5efd5d63a326
 def _read_pfm(file):
     """Read a PFM file into a Numpy array. Note that it will have
-    a shape of H x W, not W x H. Returns a tuple containing the
-    loaded image and the scale factor from the file.
+    a shape of H x W, not W x H. The values are multiplied by the scale factor
+    from the file.
+
+    Local files are memory-mapped and flipped and scaled into the output array in
+    one pass. See `utils.decode_pfm` to decode PFM files in a TensorFlow graph.
     """
     with tf.io.gfile.GFile(file, "rb") as f:
         color = None
@@ -177,10 +532,14 @@ def _read_pfm(file):
         else:
             endian = ">"  # big-endian
 
-        data = np.frombuffer(f.read(), endian + "f")
+        dtype = np.dtype(endian + "f")
         shape = (height, width, 3) if color else (height, width)
+        if "://" not in str(file):  # Local file
+            data = np.memmap(file, dtype=dtype, mode="r", offset=f.tell(), shape=shape)
+        else:
+            data = np.frombuffer(f.read(), dtype).reshape(shape)
 
-        data = np.reshape(data, shape)
-        data = np.flipud(data)
-
-        return data * abs(scale)
+        # Flip and scale in one pass
+        output = np.empty(shape, dtype=np.float32)
+        np.multiply(data[::-1], scale, out=output)
+        return output
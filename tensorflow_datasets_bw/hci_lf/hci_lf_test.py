@@ -1,14 +1,20 @@
 """hci_lf dataset."""
 
+import os
+
+import numpy as np
+import tensorflow as tf
 import tensorflow_datasets as tfds
+
 from . import hci_lf
+from .. import array_store, super_resolution, testing, utils
 
 
 class HciLfTest(tfds.testing.DatasetBuilderTestCase):
     """Tests for hci_lf dataset."""
 
     DATASET_CLASS = hci_lf.HciLf
-    BUILDER_CONFIG_NAMES_TO_TEST = ["simulated"]
+    BUILDER_CONFIG_NAMES_TO_TEST = ["simulated", "simulated_png"]
     SPLITS = {
         "train": 1,
         "test": 1,
@@ -17,5 +23,169 @@ class HciLfTest(tfds.testing.DatasetBuilderTestCase):
     DL_EXTRACT_RESULT = "hcilf"
 
 
+class HciLfPatchesTest(tfds.testing.DatasetBuilderTestCase):
+    """Tests for the patch configs of hci_lf dataset."""
+
+    DATASET_CLASS = hci_lf.HciLf
+    BUILDER_CONFIG_NAMES_TO_TEST = ["simulated_patches"]
+    # 16 x 16 patches of 32 x 32 pixels per scene
+    SPLITS = {
+        "train": 256,
+        "test": 256,
+        "validation": 256,
+    }
+    DL_EXTRACT_RESULT = "hcilf"
+
+
+class HciLfDownsampleTest(tfds.testing.TestCase):
+    """Tests for the low resolution light fields of hci_lf."""
+
+    def test_downsample_lf(self):
+        lf = np.random.default_rng(0).integers(0, 255, (3, 2, 10, 9, 3), np.uint8)
+        lf_hr, lf_lr = super_resolution.downsample_lf(lf, scale=3)
+        self.assertEqual(lf_hr.shape, (3, 2, 9, 9, 3))
+        self.assertEqual(lf_lr.shape, (3, 2, 3, 3, 3))
+        for i in range(3):
+            for j in range(2):
+                hr, lr = super_resolution.downsample(lf[i, j], scale=3)
+                self.assertAllEqual(lf_hr[i, j], hr)
+                self.assertAllEqual(lf_lr[i, j], lr)
+
+    def test_scale(self):
+        builder = hci_lf.HciLf(
+            data_dir=self.tmp_dir, config="simulated_png", views="grid:3x3", scale=2
+        )
+        testing.prepare_from_dummy_data(builder)
+        example = next(iter(builder.as_dataset(split="train")))
+        self.assertEqual(example["lf_hr"].shape, (3, 3, 512, 512, 3))
+        self.assertEqual(example["lf_lr"].shape, (3, 3, 256, 256, 3))
+        self.assertEqual(example["lf_lr"].dtype, tf.uint8)
+        self.assertEqual(example["disparity"].shape, (512, 512))
+        self.assertNotIn("lf", example)
+
+    def test_export_array_store(self):
+        builder = hci_lf.HciLf(data_dir=self.tmp_dir, config="simulated")
+        manual_dir = os.path.join(os.path.dirname(__file__), "dummy_data")
+        directory = os.path.join(self.tmp_dir, "store")
+        builder.export_array_store(directory, manual_dir, splits=["train"])
+        store = array_store.ArrayStore(directory)
+        self.assertEqual(store.splits, ["train"])
+        scene = store.keys("train")[0]
+        example = store.load("train", scene)
+        lf = builder._read_views(
+            sorted(
+                tf.io.gfile.glob(
+                    os.path.join(manual_dir, "hcilf", "training", scene, "input_*.png")
+                )
+            ),
+            *hci_lf.GRID_SHAPE,
+        )
+        self.assertEqual(example["lf"].shape, (81, 512, 512, 3))
+        self.assertAllEqual(
+            example["lf"][40, 100:164, 200:264], lf[4, 4, 100:164, 200:264]
+        )
+        self.assertAllEqual(example["lf"][3:5, 120:140], lf[0, 3:5, 120:140])
+        self.assertEqual(example["disparity"].shape, (512, 512))
+
+
+class HciLfViewsTest(tfds.testing.TestCase):
+    """Tests for the selection of views of hci_lf."""
+
+    SELECTIONS = ["center", "cross", [(8, 0), (2, 5)], "grid:3x3"]
+
+    def assert_selected_views(self, selected, lf, views):
+        positions, sub_grid = utils.lf_view_positions(views, hci_lf.GRID_SHAPE)
+        if sub_grid is not None:
+            self.assertEqual(selected.shape, (*sub_grid, 512, 512, 3))
+            selected = tf.reshape(selected, (-1, 512, 512, 3))
+        self.assertEqual(selected.shape, (len(positions), 512, 512, 3))
+        for view, (i, j) in zip(selected, positions):
+            self.assertAllEqual(view, lf[i, j])
+
+    def test_views(self):
+        builder = hci_lf.HciLf(data_dir=self.tmp_dir, config="simulated")
+        testing.prepare_from_dummy_data(builder)
+        lf = next(iter(builder.as_dataset(split="train")))["lf"]
+        for views in self.SELECTIONS:
+            builder = hci_lf.HciLf(
+                data_dir=self.tmp_dir, config="simulated", views=views
+            )
+            example = next(iter(builder.as_dataset(split="train")))
+            self.assert_selected_views(example["lf"], lf, views)
+
+    def test_decode_views(self):
+        builder = hci_lf.HciLf(data_dir=self.tmp_dir, config="simulated_png")
+        testing.prepare_from_dummy_data(builder)
+        lf = next(iter(builder.as_dataset(split="train")))["lf"]
+        for views in self.SELECTIONS:
+            dataset = builder.as_dataset(
+                split="train", decoders={"lf": hci_lf.decode_views(views)}
+            )
+            self.assert_selected_views(next(iter(dataset))["lf"], lf, views)
+            views_builder = hci_lf.HciLf(
+                data_dir=self.tmp_dir, config="simulated_png", views=views
+            )
+            example = next(iter(views_builder.as_dataset(split="train")))
+            self.assert_selected_views(example["lf"], lf, views)
+
+
+def _read_pfm_baseline(file):
+    """The original reader of hci_lf which reads the whole file into memory."""
+    with tf.io.gfile.GFile(file, "rb") as f:
+        color = f.readline().rstrip() == b"PF"
+        width, height = map(int, f.readline().split())
+        scale = float(f.readline().rstrip())
+        endian = "<" if scale < 0 else ">"
+        data = np.frombuffer(f.read(), endian + "f")
+    shape = (height, width, 3) if color else (height, width)
+    return np.flipud(np.reshape(data, shape)) * abs(scale)
+
+
+class HciLfPfmTest(tfds.testing.TestCase):
+    """Tests for hci_lf._read_pfm and utils.decode_pfm."""
+
+    def setUp(self):
+        super().setUp()
+        rng = np.random.default_rng(0)
+        self.files = tf.io.gfile.glob(
+            os.path.join(
+                testing.dummy_data_dir(hci_lf.HciLf), "hcilf", "*", "*", "*.pfm"
+            )
+        )
+        # Color big-endian and grayscale little-endian files with a scale
+        for name, identifier, shape, dtype, scale in [
+            ("color.pfm", "PF", (5, 7, 3), ">f4", 2.0),
+            ("gray.pfm", "Pf", (6, 4), "<f4", -0.5),
+        ]:
+            path = os.path.join(self.tmp_dir, name)
+            with open(path, "wb") as f:
+                f.write(f"{identifier}\n{shape[1]} {shape[0]}\n{scale}\n".encode())
+                f.write(rng.normal(size=shape).astype(dtype).tobytes())
+            self.files.append(path)
+
+    def test_read_pfm(self):
+        for file in self.files:
+            expected = _read_pfm_baseline(file)
+            self.assertAllEqual(hci_lf._read_pfm(file), expected)
+
+    def test_read_pfm_remote(self):
+        # Files with a scheme are read without memory-mapping
+        for i, file in enumerate(self.files):
+            remote_file = f"ram://pfm_test/{i}.pfm"
+            tf.io.gfile.copy(file, remote_file, overwrite=True)
+            self.assertAllEqual(hci_lf._read_pfm(remote_file), _read_pfm_baseline(file))
+
+    def test_decode_pfm(self):
+        dataset = tf.data.Dataset.from_tensor_slices(self.files).map(
+            lambda f: utils.decode_pfm(tf.io.read_file(f))
+        )
+        for file, image in zip(self.files, dataset):
+            expected = _read_pfm_baseline(file)
+            if expected.ndim == 2:
+                expected = expected[..., np.newaxis]
+            self.assertAllEqual(image, expected)
+            self.assertAllEqual(utils.decode_pfm(tf.io.read_file(file)), expected)
+
+
 if __name__ == "__main__":
     tfds.testing.test_main()
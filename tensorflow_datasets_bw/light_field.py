@@ -0,0 +1,143 @@
+"""Vectorized operations on light fields (e.g. from 'hci_lf').
+
+All functions take light fields with the shape [..., GH, GW, H, W, C] with optional
+leading batch dimensions, only use TensorFlow ops and can be used in `tf.data` map
+functions.
+"""
+from typing import Optional, Tuple, Union
+
+import tensorflow as tf
+
+
+def horizontal_epis(lf: tf.Tensor, row: Optional[int] = None) -> tf.Tensor:
+    """Extract the horizontal epipolar-plane images of one row of views.
+
+    Args:
+        lf: The light field [..., GH, GW, H, W, C].
+        row: The row of views. Defaults to the central row.
+
+    Returns:
+        The EPIs [..., H, GW, W, C]. `epis[..., y, :, :, :]` is the EPI of the image
+        row y.
+    """
+    if row is None:
+        row = tf.shape(lf)[-5] // 2
+    views = lf[..., row, :, :, :, :]  # [..., GW, H, W, C]
+    return tf.experimental.numpy.moveaxis(views, -3, -4)
+
+
+def vertical_epis(lf: tf.Tensor, column: Optional[int] = None) -> tf.Tensor:
+    """Extract the vertical epipolar-plane images of one column of views.
+
+    Args:
+        lf: The light field [..., GH, GW, H, W, C].
+        column: The column of views. Defaults to the central column.
+
+    Returns:
+        The EPIs [..., W, GH, H, C]. `epis[..., x, :, :, :]` is the EPI of the image
+        column x.
+    """
+    if column is None:
+        column = tf.shape(lf)[-4] // 2
+    views = lf[..., :, column, :, :, :]  # [..., GH, H, W, C]
+    return tf.experimental.numpy.moveaxis(views, -2, -4)
+
+
+def angular_crop(
+    lf: tf.Tensor,
+    size: Tuple[int, int],
+    offset: Optional[Tuple[int, int]] = None,
+) -> tf.Tensor:
+    """Crop a sub-grid of views from a light field.
+
+    Args:
+        lf: The light field [..., GH, GW, H, W, C].
+        size: The size (A, B) of the sub-grid.
+        offset: The position of the first view of the sub-grid. Defaults to the
+            centered sub-grid.
+
+    Returns:
+        The light field [..., A, B, H, W, C].
+    """
+    if offset is None:
+        grid = tf.shape(lf)[-5:-3]
+        offset = ((grid[0] - size[0]) // 2, (grid[1] - size[1]) // 2)
+    return lf[
+        ...,
+        offset[0] : offset[0] + size[0],
+        offset[1] : offset[1] + size[1],
+        :,
+        :,
+        :,
+    ]
+
+
+def refocus(lf: tf.Tensor, disparity: Union[float, tf.Tensor]) -> tf.Tensor:
+    """Refocus a light field by shifting all views and averaging them (shift-and-sum).
+
+    A scene point at the pixel (y, x) of the central view (ci, cj) with the disparity d
+    is assumed at the position (y - d * (i - ci), x - d * (j - cj)) in the view (i, j).
+    Each view is sampled at this position with bilinear interpolation (clamped at the
+    border) and all views are averaged. Points with the given disparity are in focus.
+
+    Args:
+        lf: The light field [..., GH, GW, H, W, C].
+        disparity: The disparity of the focal plane in pixels between neighboring views.
+            A scalar or one disparity per light field with the shape [...].
+
+    Returns:
+        The refocused images [..., H, W, C] of type float32.
+    """
+    lf = tf.cast(lf, tf.float32)
+    shape = tf.shape(lf)
+    batch_shape = shape[:-5]
+    grid_h, grid_w = shape[-5], shape[-4]
+    view_shape = shape[-3:]
+
+    disparity = tf.broadcast_to(tf.cast(disparity, tf.float32), batch_shape)
+    offsets_y = tf.cast(tf.range(grid_h) - grid_h // 2, tf.float32)[:, None]
+    offsets_x = tf.cast(tf.range(grid_w) - grid_w // 2, tf.float32)[None, :]
+    grid_shape = tf.concat([batch_shape, [grid_h, grid_w]], axis=0)
+    shifts_y = tf.broadcast_to(-disparity[..., None, None] * offsets_y, grid_shape)
+    shifts_x = tf.broadcast_to(-disparity[..., None, None] * offsets_x, grid_shape)
+
+    # Shift all views of all light fields at once
+    views = tf.reshape(lf, tf.concat([[-1], view_shape], axis=0))
+    shifted = translate(views, tf.reshape(shifts_y, [-1]), tf.reshape(shifts_x, [-1]))
+    shifted = tf.reshape(
+        shifted, tf.concat([batch_shape, [grid_h * grid_w], view_shape], axis=0)
+    )
+    return tf.reduce_mean(shifted, axis=-4)
+
+
+def translate(images: tf.Tensor, shift_y: tf.Tensor, shift_x: tf.Tensor) -> tf.Tensor:
+    """Translate a batch of images by sub-pixel shifts with bilinear interpolation.
+
+    The output pixel (y, x) of image n is sampled at (y + shift_y[n], x + shift_x[n]).
+    Positions outside of the image are clamped to the border.
+
+    Args:
+        images: The images [N, H, W, C].
+        shift_y: The vertical shifts [N].
+        shift_x: The horizontal shifts [N].
+
+    Returns:
+        The translated images [N, H, W, C] of type float32.
+    """
+    images = tf.cast(images, tf.float32)
+    images = _shift_axis(images, tf.cast(shift_y, tf.float32), axis=1)
+    return _shift_axis(images, tf.cast(shift_x, tf.float32), axis=2)
+
+
+def _shift_axis(images: tf.Tensor, shifts: tf.Tensor, axis: int) -> tf.Tensor:
+    """Linear interpolation of shifted positions along one spatial axis."""
+    size = tf.shape(images)[axis]
+    floor = tf.floor(shifts)
+    weight = shifts - floor
+    positions = tf.range(size)[None, :] + tf.cast(floor, tf.int32)[:, None]
+    idx0 = tf.clip_by_value(positions, 0, size - 1)
+    idx1 = tf.clip_by_value(positions + 1, 0, size - 1)
+    values0 = tf.gather(images, idx0, axis=axis, batch_dims=1)
+    values1 = tf.gather(images, idx1, axis=axis, batch_dims=1)
+    weight = weight[:, None, None, None]
+    return (1 - weight) * values0 + weight * values1
@@ -0,0 +1,71 @@
+"""Tests for the light field operations."""
+
+import numpy as np
+import tensorflow as tf
+import tensorflow_datasets as tfds
+
+from . import light_field
+
+
+def _synthetic_lf(image, disparity, grid=(5, 5)):
+    """A light field of a plane with a constant integer disparity."""
+    ci, cj = grid[0] // 2, grid[1] // 2
+    views = [
+        [
+            np.roll(image, (-disparity * (i - ci), -disparity * (j - cj)), (0, 1))
+            for j in range(grid[1])
+        ]
+        for i in range(grid[0])
+    ]
+    return np.array(views)
+
+
+class LightFieldTest(tfds.testing.TestCase):
+    """Tests for light_field."""
+
+    def setUp(self):
+        super(LightFieldTest, self).setUp()
+        self.lf = np.random.default_rng(0).random((2, 5, 7, 6, 8, 3), np.float32)
+
+    def test_epis(self):
+        epis = light_field.horizontal_epis(self.lf, row=1)
+        self.assertEqual(epis.shape, (2, 6, 7, 8, 3))
+        self.assertAllEqual(epis[1, 4], self.lf[1, 1, :, 4])
+        epis = light_field.vertical_epis(self.lf)
+        self.assertEqual(epis.shape, (2, 8, 5, 6, 3))
+        self.assertAllEqual(epis[0, 5], self.lf[0, :, 3, :, 5])
+
+    def test_angular_crop(self):
+        cropped = light_field.angular_crop(self.lf, (3, 3))
+        self.assertAllEqual(cropped, self.lf[:, 1:4, 2:5])
+        cropped = light_field.angular_crop(self.lf, (2, 4), offset=(0, 1))
+        self.assertAllEqual(cropped, self.lf[:, 0:2, 1:5])
+
+    def test_refocus(self):
+        image = np.random.default_rng(1).random((16, 12, 3), np.float32)
+        lfs = np.stack([_synthetic_lf(image, d) for d in [1, -2]])
+        refocused = light_field.refocus(lfs, tf.constant([1.0, -2.0]))
+        # The border is blurred by the clamping
+        expected = np.stack([image] * 2)
+        self.assertAllClose(refocused[:, 4:-4, 4:-4], expected[:, 4:-4, 4:-4])
+        self.assertAllClose(
+            light_field.refocus(self.lf, 0), np.mean(self.lf, axis=(1, 2))
+        )
+
+    def test_refocus_in_dataset(self):
+        dataset = tf.data.Dataset.from_tensor_slices(self.lf)
+        dataset = dataset.map(lambda lf: light_field.refocus(lf, 0.5))
+        for refocused, lf in zip(dataset, self.lf):
+            self.assertAllClose(refocused, light_field.refocus(lf, 0.5))
+
+    def test_translate(self):
+        images = np.arange(2 * 4 * 5, dtype=np.float32).reshape((2, 4, 5, 1))
+        translated = light_field.translate(images, [0.0, 1.0], [0.5, 0.0])
+        self.assertAllClose(
+            translated[0, :, :-1], (images[0, :, :-1] + images[0, :, 1:]) / 2
+        )
+        self.assertAllClose(translated[1, :-1], images[1, 1:])
+
+
+if __name__ == "__main__":
+    tfds.testing.test_main()
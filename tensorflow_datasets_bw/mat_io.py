@@ -0,0 +1,214 @@
+"""Loading of single variables from MATLAB files without reading the whole file.
+
+* MATLAB v5 files: Uncompressed numeric arrays are memory-mapped. Other variables are
+  loaded with `scipy.io.loadmat` restricted to the requested variable.
+* MATLAB v7.3 files (HDF5): The variables are read with h5py. `iter_slices` only reads
+  the chunks of the current slice.
+"""
+import struct
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import scipy.io
+import tensorflow as tf
+
+# Data types of MATLAB v5 data elements
+_MI_INT8 = 1
+_MI_UINT32 = 6
+_MI_INT32 = 5
+_MI_MATRIX = 14
+_MI_COMPRESSED = 15
+
+# MATLAB array classes and the data element types of their real part
+_MX_CLASSES = {
+    6: (9, "f8"),  # double
+    7: (7, "f4"),  # single
+    8: (1, "i1"),  # int8
+    9: (2, "u1"),  # uint8
+    10: (3, "i2"),  # int16
+    11: (4, "u2"),  # uint16
+    12: (5, "i4"),  # int32
+    13: (6, "u4"),  # uint32
+    14: (12, "i8"),  # int64
+    15: (13, "u8"),  # uint64
+}
+
+# Array flags which prevent memory-mapping the array
+_MX_COMPLEX_FLAG = 0x0800
+_MX_LOGICAL_FLAG = 0x0200
+
+
+def load_variable(path: str, name: str) -> np.ndarray:
+    """Load one variable of a MATLAB file.
+
+    Args:
+        path: The path to the MATLAB file.
+        name: The name of the variable.
+
+    Returns:
+        The variable. Uncompressed numeric arrays of local v5 files are returned as a
+        read-only `np.memmap`.
+    """
+    if _is_v73(path):
+        with _open_h5(path) as f:
+            return _read_h5(f, f[name])
+    array = _memmap_v5(path, name)
+    if array is not None:
+        return array
+    return _loadmat_variable(path, name)
+
+
+def iter_slices(path: str, name: str) -> Iterator[np.ndarray]:
+    """Iterate over the slices of a variable of a MATLAB file along the last axis.
+
+    Only the current slice is read into memory (e.g. one frame of a [H, W, C, T]
+    video).
+
+    Args:
+        path: The path to the MATLAB file.
+        name: The name of the variable.
+
+    Yields:
+        The slices `variable[..., i]`.
+    """
+    if _is_v73(path):
+        with _open_h5(path) as f:
+            # HDF5 stores the dimensions in reversed order
+            dataset = f[name]
+            for i in range(dataset.shape[0]):
+                yield np.transpose(dataset[i])
+        return
+    array = load_variable(path, name)
+    for i in range(array.shape[-1]):
+        yield array[..., i]
+
+
+def _is_v73(path: str) -> bool:
+    with tf.io.gfile.GFile(path, "rb") as f:
+        major_version, _ = scipy.io.matlab.matfile_version(f)
+    return major_version == 2
+
+
+def _is_local(path: str) -> bool:
+    return "://" not in str(path)
+
+
+def _loadmat_variable(path: str, name: str) -> np.ndarray:
+    with tf.io.gfile.GFile(path, "rb") as f:
+        return scipy.io.loadmat(f, variable_names=[name])[name]
+
+
+# MATLAB v5
+
+
+def _memmap_v5(path: str, name: str) -> Optional[np.memmap]:
+    """Memory-map a variable of a v5 file or return None if this is not possible."""
+    if not _is_local(path):
+        return None
+    with open(path, "rb") as f:
+        header = f.read(128)
+        endian = "<" if header[126:128] == b"IM" else ">"
+        f.seek(0, 2)
+        file_size = f.tell()
+
+        pos = 128
+        while pos + 8 <= file_size:
+            f.seek(pos)
+            data_type, num_bytes = struct.unpack(endian + "II", f.read(8))
+            if data_type == _MI_MATRIX:
+                array_info = _parse_v5_matrix(f, endian)
+                if array_info is not None and array_info[0] == name:
+                    _, dtype, shape, offset = array_info
+                    return np.memmap(
+                        path,
+                        dtype=dtype,
+                        mode="r",
+                        offset=offset,
+                        shape=shape,
+                        order="F",
+                    )
+            # Compressed elements are not padded to 64 bit
+            if data_type != _MI_COMPRESSED:
+                num_bytes = _pad8(num_bytes)
+            pos += 8 + num_bytes
+    return None
+
+
+def _parse_v5_matrix(f, endian: str) -> Optional[Tuple[str, np.dtype, tuple, int]]:
+    """Parse the header of a matrix element.
+
+    Returns:
+        A tuple of the name, dtype, shape and the offset of the data or None if the
+        matrix cannot be memory-mapped.
+    """
+    flags_type, flags = _read_v5_element(f, endian)
+    if flags_type != _MI_UINT32:
+        return None
+    array_flags = struct.unpack(endian + "I", flags[:4])[0]
+    mx_class = array_flags & 0xFF
+    if mx_class not in _MX_CLASSES:
+        return None  # Cell arrays, structs, sparse, ...
+    if array_flags & (_MX_COMPLEX_FLAG | _MX_LOGICAL_FLAG):
+        return None
+
+    dims_type, dims = _read_v5_element(f, endian)
+    if dims_type != _MI_INT32:
+        return None
+    shape = struct.unpack(endian + "i" * (len(dims) // 4), dims)
+
+    name_type, name = _read_v5_element(f, endian)
+    if name_type != _MI_INT8:
+        return None
+
+    # The real part must be stored with the type of the array class
+    data_tag = f.read(8)
+    data_type, num_bytes = struct.unpack(endian + "II", data_tag)
+    mi_type, dtype_code = _MX_CLASSES[mx_class]
+    dtype = np.dtype(endian + dtype_code)
+    if data_type != mi_type or num_bytes != int(np.prod(shape)) * dtype.itemsize:
+        return None
+    return name.decode("ascii"), dtype, shape, f.tell()
+
+
+def _read_v5_element(f, endian: str) -> Tuple[int, bytes]:
+    """Read a data element (the small data element format is supported)."""
+    data_type, num_bytes = struct.unpack(endian + "II", f.read(8))
+    if data_type >> 16:
+        # Small data element: The data is packed into the tag
+        num_bytes = data_type >> 16
+        data_type = data_type & 0xFFFF
+        f.seek(-4, 1)
+        return data_type, f.read(4)[:num_bytes]
+    data = f.read(_pad8(num_bytes))
+    return data_type, data[:num_bytes]
+
+
+def _pad8(num_bytes: int) -> int:
+    return (num_bytes + 7) // 8 * 8
+
+
+# MATLAB v7.3
+
+
+def _open_h5(path: str):
+    try:
+        import h5py
+    except ImportError as e:
+        raise ImportError(
+            "Reading MATLAB v7.3 files requires h5py. Install it with "
+            + "`pip install tensorflow-datasets-bw[h5py]`."
+        ) from e
+    if _is_local(path):
+        return h5py.File(path, "r")
+    return h5py.File(tf.io.gfile.GFile(path, "rb"), "r")
+
+
+def _read_h5(f, dataset) -> np.ndarray:
+    """Read a h5py dataset with the MATLAB order of the dimensions."""
+    if dataset.attrs.get("MATLAB_class") == b"cell":
+        refs = np.transpose(dataset[()])
+        cells = np.empty(refs.shape, dtype=object)
+        for idx, ref in np.ndenumerate(refs):
+            cells[idx] = _read_h5(f, f[ref])
+        return cells
+    return np.transpose(dataset[()])
@@ -0,0 +1,105 @@
+"""Tests for loading MATLAB files."""
+
+import importlib.util
+import os
+import unittest
+
+import numpy as np
+import scipy.io
+import tensorflow_datasets as tfds
+
+from . import mat_io
+
+
+class MatIoTest(tfds.testing.TestCase):
+    """Tests for mat_io."""
+
+    def setUp(self):
+        super(MatIoTest, self).setUp()
+        rng = np.random.default_rng(0)
+        self.variables = {
+            "video": rng.integers(0, 255, (5, 6, 3, 4)).astype(np.uint8),
+            "a": rng.random((3, 4)),
+            "cell": np.array([[np.ones((2, 3)), np.zeros((4, 1))]], dtype=object),
+        }
+
+    def _save(self, do_compression):
+        path = os.path.join(self.tmp_dir, f"test_{do_compression}.mat")
+        scipy.io.savemat(path, self.variables, do_compression=do_compression)
+        return path
+
+    def test_load_variable_memmap(self):
+        path = self._save(do_compression=False)
+        for name in ["video", "a"]:
+            variable = mat_io.load_variable(path, name)
+            self.assertIsInstance(variable, np.memmap)
+            np.testing.assert_array_equal(variable, self.variables[name])
+
+    def test_load_variable_fallback(self):
+        for do_compression in [False, True]:
+            path = self._save(do_compression=do_compression)
+            cell = mat_io.load_variable(path, "cell")
+            for c, expected in zip(cell.flat, self.variables["cell"].flat):
+                np.testing.assert_array_equal(c, expected)
+        np.testing.assert_array_equal(
+            mat_io.load_variable(path, "video"), self.variables["video"]
+        )
+
+    def test_iter_slices(self):
+        path = self._save(do_compression=False)
+        slices = list(mat_io.iter_slices(path, "video"))
+        self.assertLen(slices, 4)
+        for i, s in enumerate(slices):
+            np.testing.assert_array_equal(s, self.variables["video"][..., i])
+
+
+@unittest.skipUnless(importlib.util.find_spec("h5py"), "h5py is not installed")
+class MatIoV73Test(tfds.testing.TestCase):
+    """Tests for mat_io with MATLAB v7.3 (HDF5) files."""
+
+    def setUp(self):
+        super(MatIoV73Test, self).setUp()
+        rng = np.random.default_rng(0)
+        self.video = rng.integers(0, 255, (5, 6, 3, 4)).astype(np.uint8)
+        self.cells = [np.ones((2, 3)), np.zeros((4, 1))]
+        self.path = os.path.join(self.tmp_dir, "test_v73.mat")
+        self._save_v73(self.path)
+
+    def _save_v73(self, path):
+        import h5py
+
+        # MATLAB writes a 512 byte header with the version 0x0200 into the user block
+        with h5py.File(path, "w", userblock_size=512) as f:
+            # HDF5 stores the dimensions in reversed order
+            video = f.create_dataset(
+                "video", data=np.transpose(self.video), chunks=(1, 3, 6, 5)
+            )
+            video.attrs["MATLAB_class"] = np.bytes_("uint8")
+            refs = f.create_group("#refs#")
+            cell_refs = np.empty((2, 1), dtype=h5py.ref_dtype)
+            for i, c in enumerate(self.cells):
+                cell_refs[i, 0] = refs.create_dataset(str(i), data=np.transpose(c)).ref
+            cell = f.create_dataset("cell", data=cell_refs)
+            cell.attrs["MATLAB_class"] = np.bytes_("cell")
+        header = b"MATLAB 7.3 MAT-file".ljust(124) + b"\x00\x02IM"
+        with open(path, "r+b") as f:
+            f.write(header.ljust(512, b"\x00"))
+
+    def test_load_variable(self):
+        np.testing.assert_array_equal(
+            mat_io.load_variable(self.path, "video"), self.video
+        )
+        cell = mat_io.load_variable(self.path, "cell")
+        self.assertEqual(cell.shape, (1, 2))
+        for c, expected in zip(cell.flat, self.cells):
+            np.testing.assert_array_equal(c, expected)
+
+    def test_iter_slices(self):
+        slices = list(mat_io.iter_slices(self.path, "video"))
+        self.assertLen(slices, 4)
+        for i, s in enumerate(slices):
+            np.testing.assert_array_equal(s, self.video[..., i])
+
+
+if __name__ == "__main__":
+    tfds.testing.test_main()
@@ -5,6 +5,8 @@ import imageio
 
 import tensorflow_datasets as tfds
 
+from .. import parallel
+
 _DESCRIPTION = """
 The McMaster dataset for color demosaicking (CDM) and color image processing.
 """
@@ -23,7 +25,7 @@ _CITATION = """
 """
 
 
-class McMaster(tfds.core.GeneratorBasedBuilder):
+class McMaster(parallel.ParallelGeneratorBasedBuilder):
     """DatasetBuilder for mc_master dataset."""
 
     VERSION = tfds.core.Version("0.0.1")
@@ -58,9 +60,11 @@ class McMaster(tfds.core.GeneratorBasedBuilder):
             "test": self._generate_examples(data_path),
         }
 
-    def _generate_examples(self, path):
-        """Yields examples."""
+    def _example_keys(self, path):
+        """Returns the keys of the examples."""
         files = glob.glob(os.path.join(path, "*.tif"))
-        keys = [os.path.basename(n)[:-4] for n in files]
-        for key, file in zip(keys, files):
-            yield key, {"image": imageio.imread(file)}
+        return sorted(os.path.basename(n)[:-4] for n in files)
+
+    def _load_example(self, key, path):
+        """Loads the example with the given key."""
+        return {"image": imageio.imread(os.path.join(path, f"{key}.tif"))}
@@ -1,7 +1,10 @@
 """The McMaster dataset for image demosaicking."""
 
+import os
+
 import tensorflow_datasets as tfds
 from . import mc_master
+from .. import testing
 
 
 class McMasterTest(tfds.testing.DatasetBuilderTestCase):
@@ -14,5 +17,25 @@ class McMasterTest(tfds.testing.DatasetBuilderTestCase):
     DL_EXTRACT_RESULT = "McM"
 
 
+class McMasterWorkersTest(tfds.testing.TestCase):
+    """Tests for generating the mc_master dataset in worker processes."""
+
+    def _examples(self, num_workers):
+        builder = mc_master.McMaster(
+            data_dir=os.path.join(self.tmp_dir, str(num_workers)),
+            num_workers=num_workers,
+        )
+        testing.prepare_from_dummy_data(builder)
+        dataset = builder.as_dataset(split="test", shuffle_files=False)
+        return list(tfds.as_numpy(dataset))
+
+    def test_workers_match_serial(self):
+        examples = self._examples(num_workers=2)
+        serial_examples = self._examples(num_workers=0)
+        self.assertLen(examples, 2)
+        for example, serial_example in zip(examples, serial_examples):
+            self.assertAllEqual(example["image"], serial_example["image"])
+
+
 if __name__ == "__main__":
     tfds.testing.test_main()
@@ -1,10 +1,10 @@
 """Data sets of the Multi-Dimensional Signal Processing Research Group (MDSP) for Video
 Super-Resolution."""
 
-import numpy as np
-import scipy.io
 import tensorflow_datasets as tfds
 
+from .. import mat_io, super_resolution
+
 _DESCRIPTION = """
 The data sets have been gathered during the past several years in the Multi-Dimensional Signal
 Processing Research Group (MDSP).
@@ -64,8 +64,9 @@ class MdspColorSr(tfds.core.GeneratorBasedBuilder):
     def _generate_examples(self, paths):
         """Yields examples."""
         for key, path in paths.items():
-            video = scipy.io.loadmat(path)
-            video = video[key]
-            video = np.transpose(video, axes=[3, 0, 1, 2])
-            print(video.dtype)
-            yield NAMES[key], {"video": video}
+            # Encode the frames one by one (the frames are in the last dimension)
+            frames = [
+                super_resolution.encode_frame(frame)
+                for frame in mat_io.iter_slices(path, key)
+            ]
+            yield NAMES[key], {"video": frames}
@@ -0,0 +1,211 @@
+"""Helpers to generate examples in parallel.
+"""
+import abc
+import collections
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import numpy as np
+import tensorflow as tf
+import tensorflow_datasets as tfds
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def imap_ordered(
+    executor: Executor, fn: Callable[[T], R], iterable: Iterable[T], max_pending: int
+) -> Iterator[R]:
+    """Apply a function on each item using an executor and yield the results in order.
+
+    In contrast to `Executor.map` at most `max_pending` items are submitted at the same
+    time. This bounds the memory of results which have not been consumed yet.
+
+    Args:
+        executor: The executor running the function.
+        fn: The function.
+        iterable: The items.
+        max_pending: The maximum number of submitted items which have not been yielded.
+
+    Yields:
+        The results of the function in the order of the items.
+    """
+    pending: collections.deque = collections.deque()
+    for item in iterable:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def beam_generate_examples(
+    items: Iterable[Tuple[str, T]], load_example: Callable[[T], Dict[str, Any]]
+):
+    """Create a Beam transform which generates the examples.
+
+    The transform can be returned by `_split_generators` of a GeneratorBasedBuilder.
+    The items are sorted by key and the examples only depend on their item. Therefore,
+    the generated dataset does not depend on the runner and its parallelism.
+
+    Args:
+        items: Tuples of the example key and the input of `load_example` (e.g. the
+            path of a file).
+        load_example: A picklable function (defined at module level) which returns
+            the example for one input. It is executed on the Beam workers.
+
+    Returns:
+        A `beam.PTransform` which yields the tuples of key and example.
+    """
+    beam = tfds.core.lazy_imports.apache_beam
+    return (
+        "CreateItems" >> beam.Create(sorted(items))
+        # Distribute the items to the workers (Create yields a single bundle)
+        | "Reshuffle" >> beam.Reshuffle()
+        | "LoadExamples" >> beam.Map(_load_keyed_example, load_example)
+    )
+
+
+def _load_keyed_example(keyed_item, load_example):
+    key, item = keyed_item
+    return key, load_example(item)
+
+
+def beam_generate_example_groups(
+    items: Iterable[Tuple[str, T]],
+    load_examples: Callable[[str, T], Iterable[Tuple[str, Dict[str, Any]]]],
+):
+    """Create a Beam transform which generates multiple examples per item.
+
+    Like `beam_generate_examples` but `load_examples` gets the key and the input and
+    yields the tuples of key and example for all examples of this item (e.g. the
+    patches of an image). The keys must be unique over all items.
+
+    Args:
+        items: Tuples of the key and the input of `load_examples`.
+        load_examples: A picklable function (defined at module level) which yields
+            the tuples of key and example for one item.
+
+    Returns:
+        A `beam.PTransform` which yields the tuples of key and example.
+    """
+    beam = tfds.core.lazy_imports.apache_beam
+    return (
+        "CreateItems" >> beam.Create(sorted(items))
+        | "Reshuffle" >> beam.Reshuffle()
+        | "LoadExamples" >> beam.FlatMapTuple(load_examples)
+    )
+
+
+class ParallelGeneratorBasedBuilder(tfds.core.GeneratorBasedBuilder):
+    """GeneratorBasedBuilder which loads and encodes the examples in a process pool.
+
+    Subclasses implement `_example_keys` and `_load_example` instead of
+    `_generate_examples`. Both get the arguments which are given to
+    `_generate_examples` in `_split_generators`. The examples are yielded in the order
+    of the keys.
+
+    The workers also encode the examples (e.g. to PNG) because this is the expensive
+    part for image datasets. The encoded examples are yielded and the writer encodes
+    them again. This assumes that encoding an encoded example does not change it,
+    which holds for `Image` features with uint8 images (the bytes are passed through)
+    and for `Tensor` and `Text` features. It is checked for every example (encoding an
+    encoded example is cheap for these features).
+    """
+
+    def __init__(
+        self,
+        data_dir=None,
+        config=None,
+        version=None,
+        num_workers: Optional[int] = None,
+    ) -> None:
+        super(ParallelGeneratorBasedBuilder, self).__init__(
+            data_dir=data_dir, config=config, version=version
+        )
+        # Number of processes to generate the examples
+        # (None for the number of CPUs, 0 to generate the examples serially)
+        self.num_workers = num_workers
+
+    @abc.abstractmethod
+    def _example_keys(self, *args, **kwargs) -> List[str]:
+        """Returns the keys of the examples."""
+
+    @abc.abstractmethod
+    def _load_example(self, key: str, *args, **kwargs) -> Dict[str, Any]:
+        """Loads the example with the given key.
+
+        Called in a worker process on a copy of the builder.
+        """
+
+    def _generate_examples(self, *args, **kwargs):
+        """Yields examples."""
+        keys = self._example_keys(*args, **kwargs)
+        num_workers = self.num_workers
+        if num_workers is None:
+            num_workers = multiprocessing.cpu_count()
+        num_workers = min(num_workers, len(keys))
+
+        if num_workers <= 1:
+            for key in keys:
+                yield key, self._load_example(key, *args, **kwargs)
+            return
+
+        # Use "spawn" because forking a process which uses TensorFlow is not safe
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self, args, kwargs),
+        ) as executor:
+            examples = imap_ordered(
+                executor, _load_encoded_example, keys, max_pending=2 * num_workers
+            )
+            for key, example in zip(keys, examples):
+                _check_encoded_example(self.info.features, example)
+                yield key, example
+
+
+# State of a worker process of ParallelGeneratorBasedBuilder
+_worker_builder: Optional[ParallelGeneratorBasedBuilder] = None
+_worker_args: tuple = ()
+_worker_kwargs: Dict[str, Any] = {}
+
+
+def _init_worker(builder, args, kwargs):
+    global _worker_builder, _worker_args, _worker_kwargs
+    _worker_builder = builder
+    _worker_args = args
+    _worker_kwargs = kwargs
+
+
+def _load_encoded_example(key):
+    example = _worker_builder._load_example(key, *_worker_args, **_worker_kwargs)
+    return _worker_builder.info.features.encode_example(example)
+
+
+def _check_encoded_example(features, example) -> None:
+    """Check that the writer does not change an example which is already encoded."""
+    message = (
+        "The features cannot encode an encoded example without changing it and are "
+        "not supported with workers. Set num_workers=0 to generate the examples "
+        "serially."
+    )
+    try:
+        encoded = features.encode_example(example)
+    except (ValueError, TypeError) as e:
+        raise ValueError(message) from e
+    unchanged = tf.nest.map_structure(np.array_equal, encoded, example)
+    if not all(tf.nest.flatten(unchanged)):
+        raise ValueError(message)
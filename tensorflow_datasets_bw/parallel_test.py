@@ -0,0 +1,51 @@
+"""Tests for the helpers to generate examples in parallel."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import tensorflow_datasets as tfds
+
+from . import parallel
+
+
+class ParallelTest(tfds.testing.TestCase):
+    """Tests for parallel."""
+
+    def test_imap_ordered(self):
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = parallel.imap_ordered(
+                executor, lambda x: x * x, range(10), max_pending=2
+            )
+            self.assertEqual(list(results), [x * x for x in range(10)])
+
+    def test_abstract_hooks(self):
+        self.assertTrue(
+            {"_example_keys", "_load_example"}.issubset(
+                parallel.ParallelGeneratorBasedBuilder.__abstractmethods__
+            )
+        )
+
+    def test_check_encoded_example(self):
+        features = tfds.features.FeaturesDict(
+            {
+                "image": tfds.features.Image(shape=(None, None, 3)),
+                "label": tfds.features.Tensor(shape=(2,), dtype=np.int32),
+            }
+        )
+        example = {
+            "image": np.zeros((4, 5, 3), np.uint8),
+            "label": np.array([1, 2], np.int32),
+        }
+        parallel._check_encoded_example(features, features.encode_example(example))
+
+    def test_check_encoded_example_float_image(self):
+        features = tfds.features.FeaturesDict(
+            {"image": tfds.features.Image(shape=(4, 5, 1), dtype=np.float32)}
+        )
+        encoded = features.encode_example({"image": np.zeros((4, 5, 1), np.float32)})
+        with self.assertRaisesRegex(ValueError, "num_workers=0"):
+            parallel._check_encoded_example(features, encoded)
+
+
+if __name__ == "__main__":
+    tfds.testing.test_main()
@@ -0,0 +1,263 @@
+"""Random access to single examples of a prepared dataset.
+
+Builders which use `IndexedBuilderMixin` write an index file next to each TFRecord
+shard when the dataset is generated. The index contains the hashed key, the offset and
+the length of each record. `get_example` uses the index to read exactly one record by
+its position in the split or by the key of the example. For datasets without index
+files the offsets are recovered from the record headers (only by position).
+
+The index is written with internal APIs of tfds (`tensorflow_datasets.core.writer`). If
+they are not available, the mixin falls back to the default writer without an index.
+"""
+import json
+import os
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union
+
+import tensorflow as tf
+import tensorflow_datasets as tfds
+
+try:
+    from tensorflow_datasets.core import file_adapters, hashing, writer
+except ImportError:  # Internal modules of other tfds versions
+    file_adapters = hashing = writer = None
+
+# A TFRecord is stored as: length (8 bytes), crc of length (4 bytes), data, crc (4)
+_RECORD_HEADER_BYTES = 12
+_RECORD_OVERHEAD_BYTES = 16
+
+INDEX_SUFFIX = ".index.json"
+
+
+class _IndexedExampleWriterMixin:
+    """Writes an index file next to each TFRecord shard written by an ExampleWriter."""
+
+    def write(self, path, examples):
+        if self.file_format != file_adapters.FileFormat.TFRECORD:
+            return super(_IndexedExampleWriterMixin, self).write(path, examples)
+
+        index = {"keys": [], "offsets": [], "lengths": []}
+
+        def record_positions(examples):
+            offset = 0
+            for key, serialized in examples:
+                index["keys"].append(key)
+                index["offsets"].append(offset)
+                index["lengths"].append(len(serialized))
+                offset += len(serialized) + _RECORD_OVERHEAD_BYTES
+                yield key, serialized
+
+        result = super(_IndexedExampleWriterMixin, self).write(
+            path, record_positions(examples)
+        )
+        with tf.io.gfile.GFile(os.fspath(path) + INDEX_SUFFIX, "w") as f:
+            json.dump(index, f)
+        return result
+
+
+# The ExampleWriter with the index or None if the internal writer is not available
+IndexedExampleWriter: Optional[Type[_IndexedExampleWriterMixin]] = None
+
+if writer is not None and hasattr(writer, "ExampleWriter"):
+
+    class _IndexedExampleWriter(_IndexedExampleWriterMixin, writer.ExampleWriter):
+        """ExampleWriter which writes an index file next to each TFRecord shard."""
+
+    IndexedExampleWriter = _IndexedExampleWriter
+
+
+class IndexedBuilderMixin:
+    """Mixin for a GeneratorBasedBuilder to write the index used by `get_example`.
+
+    Usage:
+
+        class MyDataset(
+            random_access.IndexedBuilderMixin, tfds.core.GeneratorBasedBuilder
+        ):
+            ...
+
+    Without the writer hook of tfds (`_example_writer`) the dataset is written without
+    an index and `get_example` falls back to scanning the record headers.
+    """
+
+    def _example_writer(self):
+        if IndexedExampleWriter is None:
+            return super(IndexedBuilderMixin, self)._example_writer()
+        return IndexedExampleWriter(file_format=self.info.file_format)
+
+
+class RecordIndex:
+    """Index of the records of one split of a prepared dataset.
+
+    Args:
+        builder: The builder of the prepared dataset.
+        split: The name of the split (slicing is not supported).
+    """
+
+    def __init__(self, builder: tfds.core.DatasetBuilder, split: str) -> None:
+        file_format = getattr(builder.info, "file_format", None)
+        if file_adapters is not None and file_format not in (
+            None,
+            file_adapters.FileFormat.TFRECORD,
+        ):
+            raise ValueError(
+                f"Random access is only supported for TFRecord files. The dataset "
+                f"'{builder.name}' uses {file_format}."
+            )
+        self.builder = builder
+        self.split = split
+        self._disable_shuffling = builder.info.disable_shuffling
+
+        # Position of each record: (shard path, offset, length)
+        self._records: List[Tuple[str, int, int]] = []
+        self._file_sizes: Dict[str, int] = {}
+        # Position of each (hashed) key or None if a shard has no index file
+        self._positions: Optional[Dict[Any, int]] = {}
+        for path in builder.info.splits[split].filepaths:
+            path = os.fspath(path)
+            index = _read_index_file(path)
+            if index is None:
+                self._positions = None
+                offsets_lengths = _scan_records(path)
+            else:
+                offsets_lengths = zip(index["offsets"], index["lengths"])
+                if self._positions is not None:
+                    for i, key in enumerate(index["keys"], start=len(self._records)):
+                        self._positions[key] = i
+            self._records.extend((path, o, n) for o, n in offsets_lengths)
+            self._file_sizes[path] = tf.io.gfile.stat(path).length
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def position(self, key: Union[str, int]) -> int:
+        """Get the position of the example with the given key in the split."""
+        if self._positions is None:
+            raise ValueError(
+                f"The dataset '{self.builder.name}' was generated without an index of "
+                + "the example keys. Only the access by position is supported."
+            )
+        if self._disable_shuffling:
+            # The records are in the order of generation. tfds replaces keys which are
+            # not integers by the index of the example.
+            if not isinstance(key, int):
+                raise ValueError(
+                    f"The dataset '{self.builder.name}' is ordered and stores no "
+                    + "string keys. Use the position of the example instead."
+                )
+            hashed_key = key
+        elif hashing is None:
+            raise ValueError("Key lookups are not supported by this version of tfds.")
+        else:
+            hashed_key = hashing.Hasher(self.split).hash_key(key)
+        if hashed_key not in self._positions:
+            raise KeyError(f"No example with the key '{key}' in split '{self.split}'.")
+        return self._positions[hashed_key]
+
+    def read_serialized(self, position: int) -> bytes:
+        """Read the serialized example at the given position."""
+        path, offset, length = self._records[position]
+        with tf.io.gfile.GFile(path, "rb") as f:
+            f.seek(offset + _RECORD_HEADER_BYTES)
+            return f.read(length)
+
+    def read(self, position: int, decoders=None) -> Dict[str, tf.Tensor]:
+        """Read and decode the example at the given position."""
+        return self.builder.info.features.deserialize_example(
+            self.read_serialized(position), decoders=decoders
+        )
+
+    def serialized_dataset(self, positions: tf.Tensor) -> tf.data.Dataset:
+        """Create a dataset of the serialized examples at the given positions.
+
+        Only the bytes of the requested records are read. The positions can be a
+        symbolic tensor (e.g. in the function of `tf.data.Dataset.interleave`).
+
+        Args:
+            positions: The positions [N] of the examples in the split.
+
+        Returns:
+            A dataset of the N serialized examples.
+        """
+        paths, offsets, lengths = zip(*self._records) if self._records else ([],) * 3
+        # Each record is read as the only fixed length record between a header and a
+        # footer which cover the rest of the shard
+        headers = [o + _RECORD_HEADER_BYTES for o in offsets]
+        footers = [
+            self._file_sizes[p] - h - n for p, h, n in zip(paths, headers, lengths)
+        ]
+        records = tf.data.Dataset.from_tensor_slices(
+            tuple(
+                tf.gather(tf.constant(values, dtype), positions)
+                for values, dtype in [
+                    (paths, tf.string),
+                    (headers, tf.int64),
+                    (lengths, tf.int64),
+                    (footers, tf.int64),
+                ]
+            )
+        )
+        return records.flat_map(
+            lambda path, header, length, footer: tf.data.FixedLengthRecordDataset(
+                path, length, header_bytes=header, footer_bytes=footer
+            )
+        )
+
+
+def get_example(
+    builder: tfds.core.DatasetBuilder,
+    split: str,
+    index: Optional[int] = None,
+    key: Optional[Union[str, int]] = None,
+    decoders=None,
+) -> Dict[str, tf.Tensor]:
+    """Read and decode one example of a prepared dataset.
+
+    Only the requested record is read. Note that transformations which the builder
+    applies in `as_dataset` (e.g. computing the low resolution images of the default
+    super-resolution configs) are not applied. Create a `RecordIndex` to read multiple
+    examples without loading the index again.
+
+    Args:
+        builder: The builder of the prepared dataset.
+        split: The name of the split.
+        index: The position of the example in the split (as in
+            `builder.as_dataset(split, shuffle_files=False)`).
+        key: The key of the example (e.g. "antinous" for 'hci_lf'). Requires the index
+            written by `IndexedBuilderMixin`.
+        decoders: Optional decoders for the features (see `tfds.decode`).
+
+    Returns:
+        The decoded example.
+    """
+    if (index is None) == (key is None):
+        raise ValueError("Give exactly one of `index` and `key`.")
+    record_index = RecordIndex(builder, split)
+    if key is not None:
+        index = record_index.position(key)
+    assert index is not None
+    return record_index.read(index, decoders=decoders)
+
+
+def _read_index_file(path: str) -> Optional[Dict[str, list]]:
+    index_path = path + INDEX_SUFFIX
+    if not tf.io.gfile.exists(index_path):
+        return None
+    with tf.io.gfile.GFile(index_path, "r") as f:
+        return json.load(f)
+
+
+def _scan_records(path: str) -> Iterable[Tuple[int, int]]:
+    """Get the offsets and lengths of the records of a TFRecord file from headers."""
+    offsets_lengths = []
+    with tf.io.gfile.GFile(path, "rb") as f:
+        offset = 0
+        while True:
+            f.seek(offset)
+            header = f.read(_RECORD_HEADER_BYTES)
+            if len(header) < _RECORD_HEADER_BYTES:
+                break
+            (length,) = struct.unpack("<Q", header[:8])
+            offsets_lengths.append((offset, length))
+            offset += length + _RECORD_OVERHEAD_BYTES
+    return offsets_lengths
@@ -0,0 +1,80 @@
+"""Tests for the random access to single examples."""
+
+import os
+from unittest import mock
+
+import tensorflow as tf
+import tensorflow_datasets as tfds
+
+from . import random_access, testing
+from .cbsd68 import cbsd68
+from .vid4 import vid4
+
+
+class RandomAccessTest(tfds.testing.TestCase):
+    """Tests for random_access."""
+
+    def setUp(self):
+        super(RandomAccessTest, self).setUp()
+        self.builder = cbsd68.Cbsd68(data_dir=self.tmp_dir)
+        testing.prepare_from_dummy_data(self.builder)
+        self.examples = list(tfds.as_numpy(self.builder.as_dataset(split="test")))
+
+    def test_get_example_by_index(self):
+        for i, expected in enumerate(self.examples):
+            example = random_access.get_example(self.builder, "test", index=i)
+            self.assertAllEqual(example["image"], expected["image"])
+            self.assertEqual(example["id"], expected["id"])
+
+    def test_get_example_by_key(self):
+        for expected in self.examples:
+            key = expected["id"].decode()
+            example = random_access.get_example(self.builder, "test", key=key)
+            self.assertAllEqual(example["image"], expected["image"])
+        with self.assertRaises(KeyError):
+            random_access.get_example(self.builder, "test", key="unknown")
+
+    def test_serialized_dataset(self):
+        record_index = random_access.RecordIndex(self.builder, "test")
+        features = self.builder.info.features
+        dataset = record_index.serialized_dataset(tf.constant([1, 0, 1], tf.int64))
+        dataset = dataset.map(features.deserialize_example)
+        ids = [x["id"] for x in tfds.as_numpy(dataset)]
+        self.assertEqual(ids, [self.examples[i]["id"] for i in [1, 0, 1]])
+
+    def test_without_index_files(self):
+        for path in tf.io.gfile.glob(
+            os.path.join(self.builder.data_dir, "*" + random_access.INDEX_SUFFIX)
+        ):
+            tf.io.gfile.remove(path)
+        record_index = random_access.RecordIndex(self.builder, "test")
+        self.assertLen(record_index, len(self.examples))
+        self.assertEqual(record_index.read(1)["id"], self.examples[1]["id"])
+        with self.assertRaises(ValueError):
+            record_index.position("0000")
+
+    def test_fallback_without_writer(self):
+        data_dir = os.path.join(self.tmp_dir, "fallback")
+        builder = cbsd68.Cbsd68(data_dir=data_dir)
+        with mock.patch.object(random_access, "IndexedExampleWriter", None):
+            testing.prepare_from_dummy_data(builder)
+        index_files = tf.io.gfile.glob(
+            os.path.join(builder.data_dir, "*" + random_access.INDEX_SUFFIX)
+        )
+        self.assertEmpty(index_files)
+        example = random_access.get_example(builder, "test", index=1)
+        self.assertEqual(example["id"], self.examples[1]["id"])
+
+    def test_disable_shuffling(self):
+        builder = vid4.Vid4(data_dir=self.tmp_dir, config="frames")
+        testing.prepare_from_dummy_data(builder)
+        expected = list(tfds.as_numpy(builder.as_dataset(split="test")))[4]
+        example = random_access.get_example(builder, "test", index=4)
+        self.assertEqual(example["sequence"], expected["sequence"])
+        self.assertEqual(example["frame"], expected["frame"])
+        with self.assertRaises(ValueError):
+            random_access.get_example(builder, "test", key="walk_001")
+
+
+if __name__ == "__main__":
+    tfds.testing.test_main()
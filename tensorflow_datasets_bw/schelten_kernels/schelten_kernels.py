@@ -3,7 +3,8 @@
 import numpy as np
 import tensorflow as tf
 import tensorflow_datasets.public_api as tfds
-from scipy import io
+
+from .. import mat_io
 
 _DESCRIPTION = """
 Realistic blur kernels from the paper Interleaved Regression Tree Field
@@ -40,11 +41,24 @@ DMSP_KERNEL_IDX = [19, 29, 67, 68, 95]
 
 
 class ScheltenKernelsConfig(tfds.core.BuilderConfig):
-    def __init__(self, dmsp_subset=False, **kwargs):
+    """BuilderConfig for ScheltenKernels.
+
+    If `compact` is True, the kernels are stored with their original size and
+    `utils.crop_kernel_to_size` is not needed. Otherwise, they are zero-padded to
+    `MAX_HEIGHT` x `MAX_WIDTH`.
+    """
+
+    def __init__(self, dmsp_subset=False, compact=False, dtype=tf.float64, **kwargs):
         super(ScheltenKernelsConfig, self).__init__(
-            version=tfds.core.Version("0.3.0"), **kwargs
+            version=tfds.core.Version("0.4.0"),
+            release_notes={
+                "0.4.0": "Add configs with the kernels in their original size.",
+            },
+            **kwargs,
         )
         self.dmsp_subset = dmsp_subset
+        self.compact = compact
+        self.dtype = dtype
 
 
 class ScheltenKernels(tfds.core.GeneratorBasedBuilder):
@@ -59,17 +73,42 @@ class ScheltenKernels(tfds.core.GeneratorBasedBuilder):
             description="Use only the kernels used in the DMSP paper.",
             dmsp_subset=True,
         ),
+        *[
+            ScheltenKernelsConfig(
+                name=f"{subset}_compact{suffix}",
+                description=(
+                    f"Use {description} in their original size (as {dtype.name})."
+                ),
+                dmsp_subset=subset == "dmsp",
+                compact=True,
+                dtype=dtype,
+            )
+            for subset, description in [
+                ("all", "all kernels"),
+                ("dmsp", "only the kernels used in the DMSP paper"),
+            ]
+            for suffix, dtype in [("", tf.float64), ("_float32", tf.float32)]
+        ],
     ]
 
     def _info(self):
+        config = self.builder_config
+        if config.compact:
+            kernel_feature = tfds.features.Tensor(
+                shape=[None, None],
+                dtype=config.dtype,
+                encoding=tfds.features.Encoding.BYTES,
+            )
+        else:
+            kernel_feature = tfds.features.Tensor(
+                shape=[MAX_HEIGHT, MAX_WIDTH], dtype=config.dtype
+            )
         return tfds.core.DatasetInfo(
             builder=self,
             description=_DESCRIPTION,
             features=tfds.features.FeaturesDict(
                 {
-                    "kernel": tfds.features.Tensor(
-                        shape=[MAX_HEIGHT, MAX_WIDTH], dtype=tf.float64
-                    ),
+                    "kernel": kernel_feature,
                     "size": tfds.features.Tensor(shape=[2], dtype=tf.int32),
                 }
             ),
@@ -90,14 +129,16 @@ class ScheltenKernels(tfds.core.GeneratorBasedBuilder):
 
     def _generate_examples(self, dl_path):
         """Yields examples."""
-        kernels = io.loadmat(dl_path)["kernels"][0]
+        kernels = mat_io.load_variable(dl_path, "kernels")[0]
 
         if self.builder_config.dmsp_subset:
             kernels = kernels[DMSP_KERNEL_IDX]
 
         for kernel_id, kernel in enumerate(kernels):
-            # Pad the kernel to the max height and width
             size = kernel.shape
-            padding = ((0, MAX_HEIGHT - size[0]), (0, MAX_WIDTH - size[1]))
-            kernel_padded = np.pad(kernel, padding, mode="constant")
-            yield kernel_id, {"kernel": kernel_padded, "size": size}
+            kernel = kernel.astype(self.builder_config.dtype.as_numpy_dtype)
+            if not self.builder_config.compact:
+                # Pad the kernel to the max height and width
+                padding = ((0, MAX_HEIGHT - size[0]), (0, MAX_WIDTH - size[1]))
+                kernel = np.pad(kernel, padding, mode="constant")
+            yield kernel_id, {"kernel": kernel, "size": size}
@@ -9,7 +9,7 @@ class ScheltenKernelsTest(tfds.testing.DatasetBuilderTestCase):
 
     # TODO do not use the full dataset for testing
     DATASET_CLASS = schelten_kernels.ScheltenKernels
-    BUILDER_CONFIG_NAMES_TO_TEST = ["all"]
+    BUILDER_CONFIG_NAMES_TO_TEST = ["all", "all_compact_float32"]
     SPLITS = {
         "test": 192,  # Number of fake test example
     }
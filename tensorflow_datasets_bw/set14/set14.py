@@ -5,9 +5,12 @@ from __future__ import division
 from __future__ import print_function
 
 import os
+from typing import Optional
 import tensorflow as tf
 import tensorflow_datasets.public_api as tfds
 
+from .. import super_resolution, utils
+
 
 _DESCRIPTION = """
 A set of 14 images to evaluate single image super-resolution.
@@ -31,22 +34,32 @@ DOWNLOAD_URL = "https://github.com/HedgehogCode/tensorflow-datasets-bw/releases/
 class Set14(tfds.core.GeneratorBasedBuilder):
     """Set14 for single image super-resolution."""
 
-    VERSION = tfds.core.Version("0.4.0")
+    VERSION = tfds.core.Version("0.5.0")
+    RELEASE_NOTES = {
+        "0.5.0": "Add configs with the low resolution images computed at build time.",
+    }
+
+    BUILDER_CONFIGS = super_resolution.BUILDER_CONFIGS
 
     def __init__(
         self,
         data_dir=None,
         config=None,
         version=None,
-        resize_method: str = tf.image.ResizeMethod.BICUBIC,
-        antialias: bool = False,
-        scale: int = 4,
+        resize_method: Optional[str] = None,
+        antialias: Optional[bool] = None,
+        scale: Optional[int] = None,
+        num_parallel_calls: Optional[int] = tf.data.AUTOTUNE,
+        deterministic: Optional[bool] = None,
     ) -> None:
         super(Set14, self).__init__(data_dir=data_dir, config=config, version=version)
 
+        # Downsampling when reading the 'default' config (None for the defaults)
         self.resize_method = resize_method
         self.antialias = antialias
         self.scale = scale
+        self.num_parallel_calls = num_parallel_calls
+        self.deterministic = deterministic
 
     def _info(self):
         return tfds.core.DatasetInfo(
@@ -80,7 +93,14 @@ class Set14(tfds.core.GeneratorBasedBuilder):
             if image_file.endswith("png"):
                 image_id = image_file[:-4]
                 image_path = os.path.join(images_dir_path, image_file)
-                yield image_id, {"hr": image_path, "lr": image_path}
+                if self.builder_config.materialized:
+                    image = tf.io.decode_png(tf.io.read_file(image_path), channels=3)
+                    example = super_resolution.downsample_example(
+                        image, self.builder_config
+                    )
+                else:
+                    example = {"hr": image_path, "lr": image_path}
+                yield image_id, example
 
     def _as_dataset(
         self,
@@ -96,25 +116,24 @@ class Set14(tfds.core.GeneratorBasedBuilder):
             shuffle_files=shuffle_files,
         )
 
+        downsampling = super_resolution.read_time_downsampling(
+            self.builder_config,
+            scale=self.scale,
+            resize_method=self.resize_method,
+            antialias=self.antialias,
+        )
+        if downsampling is None:
+            return dataset
+
         def downsample(x):
             img = x["hr"]  # x['hr'] and x['lr'] are equal
-            hr_shape = tf.shape(img)
-            lr_size = (hr_shape[0] // self.scale, hr_shape[1] // self.scale)
-            hr_size = (lr_size[0] * self.scale, lr_size[1] * self.scale)
-
-            # Crop the high resolution image
-            hr = img[: hr_size[0], : hr_size[1], :]
-
-            # Resize the low resoltion image
-            lr = tf.image.resize(
-                hr, size=lr_size, method=self.resize_method, antialias=self.antialias
-            )
-            # Clip values and back to uint8 (not needed for nearest neighbor interpolation)
-            if not self.resize_method == "nearest":
-                lr = tf.round(lr)
-                lr = tf.clip_by_value(lr, 0, 255)
-                lr = tf.cast(lr, tf.uint8)
-
+            hr, lr = super_resolution.downsample(img, **downsampling)
             return {"hr": hr, "lr": lr}
 
-        return dataset.map(downsample)
+        return utils.parallel_map(
+            dataset,
+            downsample,
+            read_config=read_config,
+            num_parallel_calls=self.num_parallel_calls,
+            deterministic=self.deterministic,
+        )
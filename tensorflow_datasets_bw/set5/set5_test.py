@@ -1,7 +1,10 @@
 """set5 dataset."""
 
+import os
+
 import tensorflow_datasets as tfds
 from . import set5
+from .. import super_resolution, testing
 
 
 class Set5Test(tfds.testing.DatasetBuilderTestCase):
@@ -14,5 +17,32 @@ class Set5Test(tfds.testing.DatasetBuilderTestCase):
     DL_EXTRACT_RESULT = "."
 
 
+class Set5DownsamplingTest(tfds.testing.TestCase):
+    """Tests for the low resolution images of the set5 configs."""
+
+    def _examples(self, config, **kwargs):
+        builder = set5.Set5(
+            data_dir=os.path.join(self.tmp_dir, config), config=config, **kwargs
+        )
+        testing.prepare_from_dummy_data(builder)
+        dataset = builder.as_dataset(split="test", shuffle_files=False)
+        return list(tfds.as_numpy(dataset))
+
+    def test_materialized_lr(self):
+        examples = self._examples("bicubic_x2")
+        read_time_examples = self._examples("default", scale=2)
+        self.assertLen(examples, 2)
+        for example, read_time_example in zip(examples, read_time_examples):
+            hr, lr = super_resolution.downsample(example["hr"], scale=2)
+            self.assertAllEqual(example["hr"], hr)
+            self.assertAllEqual(example["lr"], lr)
+            self.assertAllEqual(example["hr"], read_time_example["hr"])
+            self.assertAllEqual(example["lr"], read_time_example["lr"])
+
+    def test_materialized_config_rejects_downsampling(self):
+        with self.assertRaisesRegex(ValueError, "scale"):
+            self._examples("bicubic_x2", scale=4)
+
+
 if __name__ == "__main__":
     tfds.testing.test_main()
@@ -0,0 +1,263 @@
+"""Shared helpers for the super-resolution datasets (Set5, Set14, Vid4, Flickr2k).
+"""
+import io
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import tensorflow as tf
+import tensorflow_datasets as tfds
+
+from . import utils
+
+
+class SuperResolutionConfig(tfds.core.BuilderConfig):
+    """BuilderConfig for super-resolution datasets.
+
+    If `scale` is None only the high resolution data is stored and the low resolution
+    data is computed when reading the dataset (configured by the builder arguments).
+    Otherwise the cropped high resolution data and the downsampled low resolution data
+    are computed once when building the dataset.
+    """
+
+    def __init__(
+        self,
+        scale: Optional[int] = None,
+        resize_method: str = tf.image.ResizeMethod.BICUBIC,
+        antialias: bool = False,
+        **kwargs,
+    ):
+        super(SuperResolutionConfig, self).__init__(**kwargs)
+        self.scale = scale
+        self.resize_method = resize_method
+        self.antialias = antialias
+
+    @property
+    def materialized(self) -> bool:
+        """If the low resolution data is computed when building the dataset."""
+        return self.scale is not None
+
+
+# The read-time downsampling if the builder arguments are not given
+DEFAULT_SCALE = 4
+DEFAULT_RESIZE_METHOD = tf.image.ResizeMethod.BICUBIC
+
+BUILDER_CONFIGS = [
+    SuperResolutionConfig(
+        name="default",
+        description="Compute the low resolution data when reading the dataset.",
+    ),
+    SuperResolutionConfig(
+        name="bicubic_x2",
+        description="Bicubic downsampling by a factor of 2.",
+        scale=2,
+    ),
+    SuperResolutionConfig(
+        name="bicubic_x3",
+        description="Bicubic downsampling by a factor of 3.",
+        scale=3,
+    ),
+    SuperResolutionConfig(
+        name="bicubic_x4",
+        description="Bicubic downsampling by a factor of 4.",
+        scale=4,
+    ),
+    SuperResolutionConfig(
+        name="bicubic_aa_x4",
+        description="Bicubic downsampling with antialiasing by a factor of 4.",
+        scale=4,
+        antialias=True,
+    ),
+]
+
+
+def read_time_downsampling(
+    config: SuperResolutionConfig,
+    scale: Optional[int] = None,
+    resize_method: Optional[str] = None,
+    antialias: Optional[bool] = None,
+) -> Optional[Dict[str, Any]]:
+    """Resolve the read-time downsampling arguments of a builder.
+
+    Args:
+        config: The builder config.
+        scale: The downsampling factor (default 4).
+        resize_method: The method used by `tf.image.resize` (default bicubic).
+        antialias: If an anti-aliasing filter should be used (default False).
+
+    Returns:
+        The keyword arguments for `downsample` or None if the config stores the low
+        resolution data.
+
+    Raises:
+        ValueError: If an argument is given for a config which stores the low
+            resolution data.
+    """
+    if config.materialized:
+        given = {
+            "scale": scale,
+            "resize_method": resize_method,
+            "antialias": antialias,
+        }
+        given_names = [name for name, value in given.items() if value is not None]
+        if given_names:
+            raise ValueError(
+                f"{', '.join(given_names)} can only be used with the configs which "
+                + "compute the low resolution data when reading the dataset. The "
+                + f"config '{config.name}' contains the low resolution data."
+            )
+        return None
+    return {
+        "scale": DEFAULT_SCALE if scale is None else scale,
+        "resize_method": (
+            DEFAULT_RESIZE_METHOD if resize_method is None else resize_method
+        ),
+        "antialias": False if antialias is None else antialias,
+    }
+
+
+def downsample(
+    hr: tf.Tensor,
+    scale: int,
+    resize_method: str = tf.image.ResizeMethod.BICUBIC,
+    antialias: bool = False,
+) -> Tuple[tf.Tensor, tf.Tensor]:
+    """Crop a high resolution image or video and downsample it.
+
+    Args:
+        hr: The high resolution image [H, W, C] or video [T, H, W, C] of type uint8.
+        scale: The downsampling factor.
+        resize_method: The method used by `tf.image.resize`.
+        antialias: If an anti-aliasing filter should be used.
+
+    Returns:
+        A tuple of the high resolution data cropped to a multiple of the scale and the
+        low resolution data.
+    """
+    hr_shape = tf.shape(hr)
+    lr_size = (hr_shape[-3] // scale, hr_shape[-2] // scale)
+    hr_size = (lr_size[0] * scale, lr_size[1] * scale)
+
+    # Crop the high resolution image
+    hr = hr[..., : hr_size[0], : hr_size[1], :]
+
+    # Resize the low resoltion image
+    lr = tf.image.resize(hr, size=lr_size, method=resize_method, antialias=antialias)
+    # Clip values and back to uint8 (not needed for nearest neighbor interpolation)
+    if not resize_method == "nearest":
+        lr = tf.round(lr)
+        lr = tf.clip_by_value(lr, 0, 255)
+        lr = tf.cast(lr, tf.uint8)
+
+    return hr, lr
+
+
+def downsample_lf(
+    lf: tf.Tensor,
+    scale: int,
+    resize_method: str = tf.image.ResizeMethod.BICUBIC,
+    antialias: bool = False,
+) -> Tuple[tf.Tensor, tf.Tensor]:
+    """Crop and downsample all views of a light field with one resize call.
+
+    Args:
+        lf: The high resolution light field [GH, GW, H, W, C] of type uint8. A selection
+            of views [N, H, W, C] or a single view [H, W, C] is also supported.
+        scale: The downsampling factor.
+        resize_method: The method used by `tf.image.resize`.
+        antialias: If an anti-aliasing filter should be used.
+
+    Returns:
+        A tuple of the high resolution light field cropped to a multiple of the scale
+        and the low resolution light field.
+    """
+    lf = tf.convert_to_tensor(lf)
+    if lf.shape.rank != 5:
+        return downsample(lf, scale, resize_method=resize_method, antialias=antialias)
+
+    grid_shape = tf.shape(lf)[:2]
+    hr, lr = downsample(
+        utils.lf_to_batch(lf),
+        scale,
+        resize_method=resize_method,
+        antialias=antialias,
+    )
+    hr = tf.reshape(hr, tf.concat([grid_shape, tf.shape(hr)[1:]], axis=0))
+    lr = tf.reshape(lr, tf.concat([grid_shape, tf.shape(lr)[1:]], axis=0))
+    return hr, lr
+
+
+def downsample_example(
+    hr: Union[np.ndarray, tf.Tensor], config: SuperResolutionConfig
+) -> Dict[str, np.ndarray]:
+    """Compute the stored high and low resolution data for a materialized config.
+
+    Args:
+        hr: The high resolution image [H, W, C] or video [T, H, W, C].
+        config: The builder config defining the downsampling.
+
+    Returns:
+        A dictionary with the numpy arrays for the keys 'hr' and 'lr'.
+    """
+    if config.scale is None:
+        raise ValueError(
+            f"The config '{config.name}' does not store the low resolution data."
+        )
+    hr, lr = downsample(
+        tf.convert_to_tensor(hr),
+        scale=config.scale,
+        resize_method=config.resize_method,
+        antialias=config.antialias,
+    )
+    return {"hr": hr.numpy(), "lr": lr.numpy()}
+
+
+def encode_frame(frame: Union[np.ndarray, tf.Tensor]) -> io.BytesIO:
+    """Encode one frame of a video as a PNG image.
+
+    A list of encoded frames can be given to a `tfds.features.Video` feature instead
+    of the full video array. Therefore, only one decoded frame needs to be kept in
+    memory when generating an example.
+
+    Args:
+        frame: The frame [H, W, C] of type uint8.
+
+    Returns:
+        A file object with the PNG encoded frame.
+    """
+    return io.BytesIO(tf.io.encode_png(frame).numpy())
+
+
+def extract_patches(
+    hr: Union[np.ndarray, tf.Tensor],
+    lr: Union[np.ndarray, tf.Tensor],
+    patch_size: int,
+    stride: Optional[int] = None,
+) -> Iterator[Tuple[Tuple[int, int], np.ndarray, np.ndarray]]:
+    """Extract aligned patch pairs from a high and low resolution image.
+
+    The patches are extracted on a regular grid of the low resolution image. Patches
+    which do not fit into the image are skipped.
+
+    Args:
+        hr: The high resolution image [H * scale, W * scale, C].
+        lr: The low resolution image [H, W, C].
+        patch_size: The size of the low resolution patches.
+        stride: The distance between two patches in the low resolution image. Defaults
+            to the patch size (non-overlapping patches).
+
+    Yields:
+        Tuples of the position (row, column) of the patch in the low resolution image,
+        the high resolution patch and the low resolution patch.
+    """
+    hr, lr = np.asarray(hr), np.asarray(lr)
+    stride = stride or patch_size
+    scale = hr.shape[0] // lr.shape[0]
+    hr_patch_size = patch_size * scale
+    for y in range(0, lr.shape[0] - patch_size + 1, stride):
+        for x in range(0, lr.shape[1] - patch_size + 1, stride):
+            hr_y, hr_x = y * scale, x * scale
+            yield (
+                (y, x),
+                hr[hr_y : hr_y + hr_patch_size, hr_x : hr_x + hr_patch_size],
+                lr[y : y + patch_size, x : x + patch_size],
+            )
@@ -0,0 +1,105 @@
+"""Helpers to generate the datasets from their dummy data in tests and benchmarks."""
+import importlib.util
+import os
+import sys
+from typing import Any, Dict, List, Tuple, Union
+from unittest import mock
+
+import tensorflow as tf
+import tensorflow_datasets as tfds
+
+
+def dummy_data_dir(builder_class) -> str:
+    """Get the directory of the dummy data next to the module of a builder class."""
+    module_file = sys.modules[builder_class.__module__].__file__
+    if module_file is None:
+        raise ValueError(f"The module of {builder_class.__name__} has no file.")
+    return os.path.join(os.path.dirname(module_file), "dummy_data")
+
+
+def prepare_from_dummy_data(
+    builder: tfds.core.DatasetBuilder,
+    dl_result: Union[None, str, Dict[str, str]] = ".",
+    **download_config_kwargs,
+) -> tfds.core.DatasetBuilder:
+    """Generate a dataset from the dummy data of its builder.
+
+    As in `tfds.testing.DatasetBuilderTestCase` the downloads are mocked and the dummy
+    data directory is the manual directory.
+
+    Args:
+        builder: The builder.
+        dl_result: The result of the mocked downloads relative to the dummy data
+            directory (as `DL_EXTRACT_RESULT` of the builder tests).
+        **download_config_kwargs: Additional arguments of the
+            `tfds.download.DownloadConfig` (e.g. `beam_runner`).
+
+    Returns:
+        The builder.
+    """
+    dummy_data = dummy_data_dir(type(builder))
+    if dl_result is not None:
+        dl_result = tf.nest.map_structure(
+            lambda p: os.path.join(dummy_data, p), dl_result
+        )
+    with mock.patch.object(
+        tfds.download.DownloadManager, "download_and_extract", return_value=dl_result
+    ), mock.patch.object(
+        tfds.download.DownloadManager, "download", return_value=dl_result
+    ):
+        builder.download_and_prepare(
+            download_config=tfds.download.DownloadConfig(
+                manual_dir=dummy_data, **download_config_kwargs
+            )
+        )
+    return builder
+
+
+def assert_beam_matches_generator(
+    test_case: tf.test.TestCase,
+    builder_class,
+    data_dir: str,
+    split: str,
+    num_examples: int,
+    **builder_kwargs,
+) -> None:
+    """Assert that the Beam generation of a dataset matches the generator.
+
+    The dataset is generated from the dummy data with `use_beam=True` on the
+    DirectRunner and with `use_beam=False`. The shard lengths and the examples in the
+    order of the hashed keys must be equal. The test is skipped if Apache Beam is not
+    installed.
+
+    Args:
+        test_case: The running test.
+        builder_class: The DatasetBuilder class with the argument `use_beam`.
+        data_dir: A directory for the two generated datasets.
+        split: The split to compare.
+        num_examples: The expected number of examples of the split.
+        **builder_kwargs: Additional arguments of the builder (e.g. the config).
+    """
+    if importlib.util.find_spec("apache_beam") is None:
+        test_case.skipTest("apache_beam is not installed")
+    beam = tfds.core.lazy_imports.apache_beam
+
+    def generate(use_beam: bool) -> Tuple[List[int], List[Dict[str, Any]]]:
+        builder = builder_class(
+            data_dir=os.path.join(data_dir, "beam" if use_beam else "generator"),
+            use_beam=use_beam,
+            **builder_kwargs,
+        )
+        prepare_from_dummy_data(
+            builder, beam_runner=beam.runners.DirectRunner() if use_beam else None
+        )
+        dataset = builder.as_dataset(split=split, shuffle_files=False)
+        return builder.info.splits[split].shard_lengths, list(tfds.as_numpy(dataset))
+
+    beam_lengths, beam_examples = generate(use_beam=True)
+    lengths, examples = generate(use_beam=False)
+    test_case.assertEqual(beam_lengths, lengths)
+    test_case.assertLen(beam_examples, num_examples)
+    test_case.assertLen(examples, num_examples)
+    for beam_example, example in zip(beam_examples, examples):
+        test_case.assertEqual(beam_example.keys(), example.keys())
+        for name in example:
+            test_case.assertAllEqual(beam_example[name], example[name])
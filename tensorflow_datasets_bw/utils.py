@@ -1,8 +1,9 @@
 """Utilities to handle datasets like common map functions.
 """
-from typing import Any, List, Tuple, TypeVar, Dict, Callable, Union
+from typing import Any, List, Optional, Tuple, TypeVar, Dict, Callable, Union
 
 import tensorflow as tf
+import tensorflow_datasets as tfds
 
 T = TypeVar("T")
 K = TypeVar("K")
@@ -11,6 +12,10 @@ K = TypeVar("K")
 def get_one_example(dataset: tf.data.Dataset, index: int = 0, random: bool = False):
     """Get one example of a TensorFlow dataset for testing/visualization.
 
+    All examples before the index are read and decoded. Use
+    `random_access.get_example` to read only one example of a prepared dataset by its
+    index or key.
+
     Args:
         dataset: The TensorFlow dataset.
         index: The index of the example (default: 0).
@@ -35,6 +40,38 @@ def get_one_example(dataset: tf.data.Dataset, index: int = 0, random: bool = Fal
 # General helpers for mapping functions
 
 
+def parallel_map(
+    dataset: tf.data.Dataset,
+    map_func: Callable[[Any], Any],
+    read_config: Optional[tfds.ReadConfig] = None,
+    num_parallel_calls: Optional[int] = tf.data.AUTOTUNE,
+    deterministic: Optional[bool] = None,
+) -> tf.data.Dataset:
+    """Apply a mapping function on a dataset in parallel and prefetch the results.
+
+    Used by the dataset builders which transform the examples in `_as_dataset`.
+
+    Args:
+        dataset: The TensorFlow dataset.
+        map_func: The mapping function.
+        read_config: The `tfds.ReadConfig` of the dataset. The results are prefetched
+            unless `read_config.skip_prefetch` is set (default: None).
+        num_parallel_calls: The number of elements to process in parallel
+            (default: tf.data.AUTOTUNE).
+        deterministic: If the order of the elements must be preserved. None to use
+            the `tf.data.Options` of the dataset (default: None).
+
+    Returns:
+        The mapped dataset.
+    """
+    dataset = dataset.map(
+        map_func, num_parallel_calls=num_parallel_calls, deterministic=deterministic
+    )
+    if read_config is None or not read_config.skip_prefetch:
+        dataset = dataset.prefetch(tf.data.AUTOTUNE)
+    return dataset
+
+
 def compose(*functions: Callable[[Any], Any]) -> Callable[[Any], Any]:
     """Compose the given functions which all take one argument.
 
@@ -53,6 +90,80 @@ def compose(*functions: Callable[[Any], Any]) -> Callable[[Any], Any]:
     return apply
 
 
+class Transform:
+    """A sequence of mapping functions which is applied to a dataset as one stage.
+
+    Calling `dataset.map` for each function (e.g. `get_image`, `to_float32`,
+    `from_255_to_1_range` and `resize`) creates one dataset stage per function. A
+    Transform traces the composed functions into a single function and applies it in
+    one parallel map. If `batch_size` is set, the dataset is batched first and the
+    functions are applied to whole batches (all functions must support a leading batch
+    dimension).
+
+    Example:
+
+        transform = Transform(get_image, to_unit_range(tf.float16), resize([64, 64]))
+        dataset = transform.apply(dataset)
+
+    Args:
+        functions: The mapping functions in the order in which they are applied.
+        batch_size: Batch the dataset before applying the functions (default: None).
+        drop_remainder: If the last smaller batch should be dropped (default: False).
+        num_parallel_calls: The number of elements (or batches) to process in parallel
+            (default: tf.data.AUTOTUNE).
+        deterministic: If the order of the elements must be preserved. None to use
+            the `tf.data.Options` of the dataset (default: None).
+    """
+
+    def __init__(
+        self,
+        *functions: Callable[[Any], Any],
+        batch_size: Optional[int] = None,
+        drop_remainder: bool = False,
+        num_parallel_calls: Optional[int] = tf.data.AUTOTUNE,
+        deterministic: Optional[bool] = None,
+    ) -> None:
+        self.functions = functions
+        self.batch_size = batch_size
+        self.drop_remainder = drop_remainder
+        self.num_parallel_calls = num_parallel_calls
+        self.deterministic = deterministic
+
+    def __call__(self, x):
+        for f in self.functions:
+            x = f(x)
+        return x
+
+    def then(self, *functions: Callable[[Any], Any]) -> "Transform":
+        """Create a Transform which applies the given functions after this one."""
+        return Transform(
+            *self.functions,
+            *functions,
+            batch_size=self.batch_size,
+            drop_remainder=self.drop_remainder,
+            num_parallel_calls=self.num_parallel_calls,
+            deterministic=self.deterministic,
+        )
+
+    def apply(self, dataset: tf.data.Dataset) -> tf.data.Dataset:
+        """Apply the functions to the dataset and prefetch the results.
+
+        Args:
+            dataset: The TensorFlow dataset.
+
+        Returns:
+            The mapped (and batched) dataset.
+        """
+        if self.batch_size is not None:
+            dataset = dataset.batch(self.batch_size, drop_remainder=self.drop_remainder)
+        return parallel_map(
+            dataset,
+            self,
+            num_parallel_calls=self.num_parallel_calls,
+            deterministic=self.deterministic,
+        )
+
+
 def map_on_dict(
     map: Callable[[tf.Tensor], tf.Tensor]
 ) -> Callable[[Dict[K, tf.Tensor]], Dict[K, tf.Tensor]]:
@@ -149,6 +260,29 @@ def from_255_to_1_range(x: tf.Tensor) -> tf.Tensor:
     return x / 255
 
 
+def to_unit_range(
+    dtype: tf.DType = tf.float32,
+) -> Callable[[tf.Tensor], tf.Tensor]:
+    """Create a function which converts an image from range 0-255 to 0-1.
+
+    Replaces `compose(to_float32, from_255_to_1_range)` with a single cast to the given
+    type. With `tf.float16` or `tf.bfloat16` no float32 intermediate is created and
+    the converted images need half of the memory.
+
+    Args:
+        dtype: The floating point type of the result (default: tf.float32).
+
+    Returns:
+        A function which takes an image tensor of range 0-255 (e.g. uint8) and returns
+        the image tensor of the given type in range 0-1.
+    """
+
+    def apply(x):
+        return tf.cast(x, dtype) / tf.constant(255, dtype)
+
+    return apply
+
+
 def resize(
     size: Union[List[int], Tuple[int], tf.TensorShape]
 ) -> Callable[[tf.Tensor], tf.Tensor]:
@@ -171,6 +305,8 @@ def resize(
 def crop_kernel_to_size(x: Dict[str, tf.Tensor]) -> Dict[str, tf.Tensor]:
     """Crops the tensor with the name 'kernel' to the original size.
 
+    Not needed for datasets which store the kernels in their original size (e.g. the
+    '*_compact' configs of 'schelten_kernels').
 
     Args:
         x: A dictionary which should contain a tensor for the key 'kernel which will be cropped and
@@ -184,6 +320,42 @@ def crop_kernel_to_size(x: Dict[str, tf.Tensor]) -> Dict[str, tf.Tensor]:
     return {"kernel": kernel[: size[0], : size[1]]}
 
 
+def decode_pfm(contents: tf.Tensor) -> tf.Tensor:
+    """Decode a PFM encoded image (e.g. a depth or disparity map).
+
+    The values are multiplied by the scale factor from the file. Use together with
+    `tf.io.read_file` to decode PFM files in a `tf.data` pipeline.
+
+    Args:
+        contents: A scalar string tensor with the PFM encoded image.
+
+    Returns:
+        tf.Tensor: The float32 image with the shape [H, W, C]. C is 3 for color and 1
+            for grayscale images.
+    """
+    # The header consists of three lines: identifier, dimensions, scale
+    parts = tf.strings.split(contents, "\n", maxsplit=3)
+    identifier = tf.strings.strip(parts[0])
+    tf.debugging.assert_equal(
+        tf.logical_or(identifier == "PF", identifier == "Pf"),
+        True,
+        message="Not a PFM file.",
+    )
+    channels = tf.where(identifier == "PF", 3, 1)
+    dims = tf.strings.to_number(tf.strings.split(tf.strings.strip(parts[1])), tf.int32)
+    width, height = dims[0], dims[1]
+    scale = tf.strings.to_number(tf.strings.strip(parts[2]), tf.float32)
+
+    # A negative scale marks little-endian data
+    data = tf.cond(
+        scale < 0,
+        lambda: tf.io.decode_raw(parts[3], tf.float32, little_endian=True),
+        lambda: tf.io.decode_raw(parts[3], tf.float32, little_endian=False),
+    )
+    image = tf.reshape(data[: height * width * channels], [height, width, channels])
+    return tf.reverse(image, axis=[0]) * tf.abs(scale)
+
+
 # Helpers for light fields
 
 
@@ -197,7 +369,7 @@ def lf_to_batch(lf: tf.Tensor) -> tf.Tensor:
         tf.Tensor: The flattened batch of light field images with shape [GH x GW, H, W, C]
     """
     size = tf.shape(lf)[2:]
-    return tf.reshape(lf, (-1, *size))
+    return tf.reshape(lf, tf.concat([[-1], size], axis=0))
 
 
 def lf_batch_idx(grid, i: int, j: int):
@@ -212,3 +384,77 @@ def lf_batch_idx(grid, i: int, j: int):
         The index in a flattened light field.
     """
     return i * grid[1] + j
+
+
+def lf_view_positions(
+    views: Union[str, List[Tuple[int, int]]], grid
+) -> Tuple[List[Tuple[int, int]], Optional[Tuple[int, int]]]:
+    """Compute the grid positions of a selection of light field views.
+
+    Args:
+        views: The selection of views. One of
+            * "center": The central view.
+            * "cross": The central row and column of the grid in row-major order.
+            * "grid:AxB": A regular angular subsample with A x B views which is
+              centered in the grid (e.g. "grid:5x5" is every other view of a 9 x 9
+              grid including the corner views and "grid:1x1" is the central view).
+            * A list of (i, j) positions.
+        grid (Tuple): The shape of the light field grid
+
+    Returns:
+        A tuple of the list of (i, j) positions and the shape of the selected grid.
+        The shape is None if the selection is not a grid ("cross" or a list).
+    """
+    if not isinstance(views, str):
+        positions = [(int(i), int(j)) for i, j in views]
+        for i, j in positions:
+            if not (0 <= i < grid[0] and 0 <= j < grid[1]):
+                raise ValueError(f"View ({i}, {j}) is outside of the grid {grid}.")
+        return positions, None
+
+    center = (grid[0] // 2, grid[1] // 2)
+    if views == "center":
+        return [center], (1, 1)
+    if views == "cross":
+        positions = [
+            (i, j)
+            for i in range(grid[0])
+            for j in range(grid[1])
+            if i == center[0] or j == center[1]
+        ]
+        return positions, None
+    if views.startswith("grid:"):
+        sub_grid = tuple(int(n) for n in views[len("grid:") :].split("x"))
+        if len(sub_grid) != 2 or not all(1 <= s <= g for s, g in zip(sub_grid, grid)):
+            raise ValueError(f"Invalid view grid '{views}' for the grid {grid}.")
+        rows, cols = [_centered_grid_indices(s, g) for s, g in zip(sub_grid, grid)]
+        return [(i, j) for i in rows for j in cols], sub_grid
+    raise ValueError(f"Unknown view selection '{views}'.")
+
+
+def _centered_grid_indices(num: int, size: int) -> List[int]:
+    """Regularly spaced indices with the largest possible step centered in a range."""
+    step = (size - 1) // (num - 1) if num > 1 else 0
+    offset = (size - 1 - (num - 1) * step) // 2
+    return [offset + k * step for k in range(num)]
+
+
+def lf_select_views(lf: tf.Tensor, views: Union[str, List[Tuple[int, int]]]):
+    """Select a subset of the views of a light field.
+
+    Args:
+        lf (TensorLike): The light field with shape [GH, GW, H, W, C]. The grid shape
+            must be known statically.
+        views: The selection of views. See `lf_view_positions`.
+
+    Returns:
+        tf.Tensor: The selected views with the shape [A, B, H, W, C] if the selection
+            is a grid and [N, H, W, C] otherwise.
+    """
+    grid = tuple(lf.shape[:2])
+    positions, sub_grid = lf_view_positions(views, grid)
+    idx = [lf_batch_idx(grid, i, j) for i, j in positions]
+    selected = tf.gather(lf_to_batch(lf), idx)
+    if sub_grid is None:
+        return selected
+    return tf.reshape(selected, tf.concat([sub_grid, tf.shape(selected)[1:]], axis=0))
@@ -0,0 +1,161 @@
+"""Tests for the dataset utilities."""
+
+import time
+
+import numpy as np
+import tensorflow as tf
+import tensorflow_datasets as tfds
+
+from . import utils
+
+
+class TransformTest(tfds.testing.TestCase):
+    """Tests for utils.Transform."""
+
+    def setUp(self):
+        super(TransformTest, self).setUp()
+        images = np.random.default_rng(0).integers(0, 255, (5, 8, 6, 3), np.uint8)
+        self.dataset = tf.data.Dataset.from_tensor_slices({"image": images})
+
+    def test_apply(self):
+        functions = [
+            utils.get_image,
+            utils.to_float32,
+            utils.from_255_to_1_range,
+            utils.resize([4, 3]),
+        ]
+        expected = self.dataset
+        for f in functions:
+            expected = expected.map(f)
+        transformed = utils.Transform(*functions).apply(self.dataset)
+        for x, y in zip(transformed, expected):
+            self.assertAllClose(x, y)
+
+        batched = utils.Transform(*functions, batch_size=2).apply(self.dataset)
+        self.assertAllClose(
+            tf.concat(list(batched), axis=0), tf.stack(list(expected), axis=0)
+        )
+
+    def test_then(self):
+        transform = utils.Transform(utils.get_image).then(utils.to_float32)
+        self.assertLen(transform.functions, 2)
+        self.assertEqual(transform.apply(self.dataset).element_spec.dtype, tf.float32)
+
+    def test_to_unit_range(self):
+        image = tf.constant([0, 1, 128, 255], dtype=tf.uint8)
+        expected = image.numpy() / 255
+        tolerances = [(tf.float32, 1e-7), (tf.float16, 1e-3), (tf.bfloat16, 4e-3)]
+        for dtype, atol in tolerances:
+            converted = utils.to_unit_range(dtype)(image)
+            self.assertEqual(converted.dtype, dtype)
+            self.assertAllClose(tf.cast(converted, tf.float64), expected, atol=atol)
+
+
+class ParallelMapTest(tfds.testing.TestCase):
+    """Tests for utils.parallel_map."""
+
+    def dataset_ops(self, dataset):
+        graph_def = tf.compat.v1.GraphDef.FromString(
+            dataset._as_serialized_graph().numpy()
+        )
+        return {node.op: node for node in graph_def.node}
+
+    def test_num_parallel_calls(self):
+        dataset = tf.data.Dataset.range(8)
+        sequential = utils.parallel_map(
+            dataset, lambda x: 2 * x, num_parallel_calls=None
+        )
+        self.assertIn("MapDataset", self.dataset_ops(sequential))
+        self.assertNotIn("ParallelMapDatasetV2", self.dataset_ops(sequential))
+        parallel = utils.parallel_map(dataset, lambda x: 2 * x, num_parallel_calls=4)
+        self.assertIn("ParallelMapDatasetV2", self.dataset_ops(parallel))
+        self.assertEqual(list(parallel.as_numpy_iterator()), list(range(0, 16, 2)))
+
+    def test_deterministic(self):
+        def slow_identity(x):
+            # Earlier elements take longer to finish
+            def sleep(x):
+                time.sleep(0.01 * (8 - int(x)))
+                return x
+
+            return tf.py_function(sleep, [x], tf.int64)
+
+        dataset = utils.parallel_map(
+            tf.data.Dataset.range(8),
+            slow_identity,
+            num_parallel_calls=8,
+            deterministic=True,
+        )
+        ops = self.dataset_ops(dataset)
+        self.assertEqual(ops["ParallelMapDatasetV2"].attr["deterministic"].s, b"true")
+        self.assertEqual(list(dataset.as_numpy_iterator()), list(range(8)))
+
+    def test_skip_prefetch(self):
+        dataset = tf.data.Dataset.range(8)
+        prefetched = utils.parallel_map(dataset, lambda x: x)
+        self.assertIn("PrefetchDataset", self.dataset_ops(prefetched))
+        not_prefetched = utils.parallel_map(
+            dataset, lambda x: x, tfds.ReadConfig(skip_prefetch=True)
+        )
+        self.assertNotIn("PrefetchDataset", self.dataset_ops(not_prefetched))
+        self.assertEqual(list(not_prefetched.as_numpy_iterator()), list(range(8)))
+
+
+class LightFieldViewsTest(tfds.testing.TestCase):
+    """Tests for utils.lf_view_positions."""
+
+    def test_grid(self):
+        positions, sub_grid = utils.lf_view_positions("grid:1x1", (9, 9))
+        self.assertEqual(positions, [(4, 4)])
+        self.assertEqual(sub_grid, (1, 1))
+        positions, _ = utils.lf_view_positions("grid:3x3", (9, 9))
+        self.assertEqual(positions, [(i, j) for i in [0, 4, 8] for j in [0, 4, 8]])
+        positions, _ = utils.lf_view_positions("grid:4x2", (9, 9))
+        self.assertEqual(positions, [(i, j) for i in [1, 3, 5, 7] for j in [0, 8]])
+
+    def test_cross(self):
+        positions, sub_grid = utils.lf_view_positions("cross", (9, 9))
+        self.assertLen(positions, 17)
+        self.assertEqual(
+            positions,
+            [(i, j) for i in range(9) for j in range(9) if i == 4 or j == 4],
+        )
+        self.assertIsNone(sub_grid)
+
+    def test_list(self):
+        positions, sub_grid = utils.lf_view_positions([(0, 8), (2, 3)], (9, 9))
+        self.assertEqual(positions, [(0, 8), (2, 3)])
+        self.assertIsNone(sub_grid)
+        with self.assertRaises(ValueError):
+            utils.lf_view_positions([(0, 9)], (9, 9))
+
+
+class LightFieldSelectViewsTest(tfds.testing.TestCase):
+    """Tests for utils.lf_select_views."""
+
+    def setUp(self):
+        super().setUp()
+        self.lf = np.random.default_rng(0).integers(0, 255, (9, 9, 4, 5, 3), np.uint8)
+
+    def test_cross(self):
+        selected = utils.lf_select_views(self.lf, "cross")
+        self.assertEqual(selected.shape, (17, 4, 5, 3))
+        positions, _ = utils.lf_view_positions("cross", (9, 9))
+        for view, (i, j) in zip(selected, positions):
+            self.assertAllEqual(view, self.lf[i, j])
+
+    def test_list(self):
+        selected = utils.lf_select_views(self.lf, [(8, 0), (4, 4), (1, 7)])
+        self.assertEqual(selected.shape, (3, 4, 5, 3))
+        self.assertAllEqual(selected[0], self.lf[8, 0])
+        self.assertAllEqual(selected[1], self.lf[4, 4])
+        self.assertAllEqual(selected[2], self.lf[1, 7])
+
+    def test_grid(self):
+        selected = utils.lf_select_views(self.lf, "grid:3x3")
+        self.assertEqual(selected.shape, (3, 3, 4, 5, 3))
+        self.assertAllEqual(selected, self.lf[::4, ::4])
+
+
+if __name__ == "__main__":
+    tfds.testing.test_main()
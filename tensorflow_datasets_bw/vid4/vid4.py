@@ -1,6 +1,8 @@
 """vid4 dataset."""
 
+import functools
 import os
+from typing import List, Optional
 
 import imageio
 import numpy as np
@@ -8,6 +10,8 @@ import numpy as np
 import tensorflow as tf
 import tensorflow_datasets as tfds
 
+from .. import random_access, super_resolution, utils
+
 _DESCRIPTION = """
 Classical dataset for testing video super-resolution consisting of 4 image sequences.
 
@@ -16,6 +20,11 @@ The sequences are
 * foliage (740x480, 49 frames)
 * city (704x576, 34 frames)
 * calendar (720x576, 41 frames)
+
+The "frames" configs yield one example per frame in the order of the sequences. Use the
+builder arguments `clip_length` and `clip_stride` to read clips of consecutive frames.
+Each clip only decodes its own frames and the clips can be shuffled with
+`shuffle_files=True`.
 """
 
 _CITATION = """
@@ -31,40 +40,92 @@ _CITATION = """
 
 DOWNLOAD_URL = "https://github.com/HedgehogCode/tensorflow-datasets-bw/releases/download/0.10.0/Vid4.zip"
 
+SEQUENCES = ["walk", "foliage", "city", "calendar"]
+
+
+class Vid4Config(super_resolution.SuperResolutionConfig):
+    def __init__(self, frames=False, **kwargs):
+        super(Vid4Config, self).__init__(**kwargs)
+        self.frames = frames
 
-class Vid4(tfds.core.GeneratorBasedBuilder):
+
+class Vid4(random_access.IndexedBuilderMixin, tfds.core.GeneratorBasedBuilder):
     """DatasetBuilder for vid4 dataset."""
 
-    VERSION = tfds.core.Version("0.1.0")
+    VERSION = tfds.core.Version("0.2.0")
     RELEASE_NOTES = {
         "0.1.0": "Initial release.",
+        "0.2.0": "Add configs with the low resolution videos computed at build time "
+        + "and configs with one example per frame.",
     }
 
+    BUILDER_CONFIGS = super_resolution.BUILDER_CONFIGS + [
+        Vid4Config(
+            name="frames",
+            description="One example per frame. "
+            + "Compute the low resolution frames when reading the dataset.",
+            frames=True,
+        ),
+        Vid4Config(
+            name="frames_bicubic_x4",
+            description="One example per frame. "
+            + "Bicubic downsampling by a factor of 4.",
+            frames=True,
+            scale=4,
+        ),
+    ]
+
     def __init__(
         self,
         data_dir=None,
         config=None,
         version=None,
-        resize_method: str = tf.image.ResizeMethod.BICUBIC,
-        antialias: bool = False,
-        scale: int = 4,
+        resize_method: Optional[str] = None,
+        antialias: Optional[bool] = None,
+        scale: Optional[int] = None,
+        num_parallel_calls: Optional[int] = tf.data.AUTOTUNE,
+        deterministic: Optional[bool] = None,
+        clip_length: Optional[int] = None,
+        clip_stride: int = 1,
     ) -> None:
         super(Vid4, self).__init__(data_dir=data_dir, config=config, version=version)
+        # Downsampling when reading the 'default' and 'frames' configs (None for the
+        # defaults)
         self.resize_method = resize_method
         self.antialias = antialias
         self.scale = scale
+        self.num_parallel_calls = num_parallel_calls
+        self.deterministic = deterministic
+        # Only for the "frames" configs
+        self.clip_length = clip_length
+        self.clip_stride = clip_stride
+
+    @property
+    def _frames(self) -> bool:
+        return getattr(self.builder_config, "frames", False)
 
     def _info(self) -> tfds.core.DatasetInfo:
         """Returns the dataset metadata."""
+        if self._frames:
+            features = {
+                "hr": tfds.features.Image(shape=(None, None, 3)),
+                "lr": tfds.features.Image(shape=(None, None, 3)),
+                "sequence": tfds.features.Text(),
+                "frame": tf.int32,
+            }
+        else:
+            features = {
+                "hr": tfds.features.Video(shape=(None, None, None, 3)),
+                "lr": tfds.features.Video(shape=(None, None, None, 3)),
+            }
         return tfds.core.DatasetInfo(
             builder=self,
             description=_DESCRIPTION,
-            features=tfds.features.FeaturesDict(
-                {
-                    "hr": tfds.features.Video(shape=(None, None, None, 3)),
-                    "lr": tfds.features.Video(shape=(None, None, None, 3)),
-                }
-            ),
+            features=tfds.features.FeaturesDict(features),
+            # The frames must stay in order to read clips
+            disable_shuffling=self._frames,
+            # The number of frames of each sequence in the order of the records
+            metadata=tfds.core.MetadataDict() if self._frames else None,
             homepage="https://github.com/YounggjuuChoi/Deep-Video-Super-Resolution/blob/master/Doc/Dataset.md#1-vid4",
             citation=_CITATION,
         )
@@ -79,43 +140,150 @@ class Vid4(tfds.core.GeneratorBasedBuilder):
 
     def _generate_examples(self, path):
         """Yields examples."""
-        for sequence in ["walk", "foliage", "city", "calendar"]:
+        for sequence in SEQUENCES:
             with tf.io.gfile.GFile(os.path.join(path, f"{sequence}.txt"), "r") as f:
                 image_files = f.read().splitlines()
-            video = np.array(
-                [imageio.imread(os.path.join(path, f)) for f in image_files]
-            )
-            yield sequence, {"hr": video, "lr": np.zeros((1, 1, 1, 3), dtype=np.uint8)}
+            if self._frames:
+                yield from self._generate_frames(path, sequence, image_files)
+                continue
+            image_paths = [os.path.join(path, f) for f in image_files]
+            if self.builder_config.materialized:
+                # Downsample and encode the frames one by one
+                hr, lr = [], []
+                for image_path in image_paths:
+                    frame = super_resolution.downsample_example(
+                        imageio.imread(image_path), self.builder_config
+                    )
+                    hr.append(super_resolution.encode_frame(frame["hr"]))
+                    lr.append(super_resolution.encode_frame(frame["lr"]))
+                example = {"hr": hr, "lr": lr}
+            else:
+                # The encoded frames are copied without decoding them
+                example = {
+                    "hr": image_paths,
+                    "lr": np.zeros((1, 1, 1, 3), dtype=np.uint8),
+                }
+            yield sequence, example
+
+    def _generate_frames(self, path, sequence, image_files):
+        """Yields one example per frame of the sequence."""
+        self.info.metadata.setdefault("num_frames", {})[sequence] = len(image_files)
+        for frame, image_file in enumerate(image_files):
+            image_path = os.path.join(path, image_file)
+            if self.builder_config.materialized:
+                example = super_resolution.downsample_example(
+                    imageio.imread(image_path), self.builder_config
+                )
+            else:
+                example = {"hr": image_path, "lr": np.zeros((1, 1, 3), dtype=np.uint8)}
+            example["sequence"] = sequence
+            example["frame"] = frame
+            yield f"{sequence}_{frame:03d}", example
 
     def _as_dataset(
         self, split="train", decoders=None, read_config=None, shuffle_files=False
     ):
+        downsampling = super_resolution.read_time_downsampling(
+            self.builder_config,
+            scale=self.scale,
+            resize_method=self.resize_method,
+            antialias=self.antialias,
+        )
+        if self.clip_length is not None:
+            if not self._frames:
+                raise ValueError("Clips can only be read from the 'frames' configs.")
+            return self._as_clip_dataset(
+                split, decoders, read_config, shuffle_files, downsampling
+            )
+
         dataset = super(Vid4, self)._as_dataset(
             split=split,
             decoders=decoders,
             read_config=read_config,
             shuffle_files=shuffle_files,
         )
+        if downsampling is None:
+            return dataset
+        return utils.parallel_map(
+            dataset,
+            functools.partial(_downsample, **downsampling),
+            read_config=read_config,
+            num_parallel_calls=self.num_parallel_calls,
+            deterministic=self.deterministic,
+        )
 
-        def downsample(x):
-            video = x["hr"]  # x['hr'] and x['lr'] are equal
-            hr_shape = tf.shape(video)
-            lr_size = (hr_shape[1] // self.scale, hr_shape[2] // self.scale)
-            hr_size = (lr_size[0] * self.scale, lr_size[1] * self.scale)
+    def _as_clip_dataset(
+        self, split, decoders, read_config, shuffle_files, downsampling
+    ):
+        """Read clips of consecutive frames of one sequence.
 
-            # Crop the high resolution video
-            hr = video[:, : hr_size[0], : hr_size[1], :]
+        The start positions of the clips are computed from the number of frames of
+        each sequence which is stored when generating the dataset. Each clip only reads
+        the records of its own frames (with the offsets of `random_access.RecordIndex`)
+        such that the clips can be shuffled.
+        """
+        record_index = random_access.RecordIndex(self, split)
+        starts = _clip_starts(
+            list(self.info.metadata["num_frames"].values()),
+            self.clip_length,
+            self.clip_stride,
+        )
+        clips = tf.data.Dataset.from_tensor_slices(tf.constant(starts, tf.int64))
+        if shuffle_files:
+            seed = read_config.shuffle_seed if read_config is not None else None
+            clips = clips.shuffle(max(len(starts), 1), seed=seed)
 
-            # Resize the low resoltion image
-            lr = tf.image.resize(
-                hr, size=lr_size, method=self.resize_method, antialias=self.antialias
+        features = self.info.features
+
+        def read_clip(start):
+            frames = record_index.serialized_dataset(
+                tf.range(start, start + self.clip_length)
+            )
+            frames = frames.map(
+                lambda r: features.deserialize_example(r, decoders=decoders)
             )
-            # Clip values and back to uint8 (not needed for nearest neighbor interpolation)
-            if not self.resize_method == "nearest":
-                lr = tf.round(lr)
-                lr = tf.clip_by_value(lr, 0, 255)
-                lr = tf.cast(lr, tf.uint8)
+            return frames.batch(self.clip_length)
+
+        clips = clips.interleave(
+            read_clip,
+            num_parallel_calls=self.num_parallel_calls,
+            deterministic=self.deterministic,
+        )
+        if read_config is not None:
+            clips = clips.with_options(read_config.options)
+        if downsampling is None:
+            return clips.prefetch(tf.data.AUTOTUNE)
+        # Downsample all frames of a clip at once
+        return utils.parallel_map(
+            clips,
+            functools.partial(_downsample, **downsampling),
+            read_config=read_config,
+            num_parallel_calls=self.num_parallel_calls,
+            deterministic=self.deterministic,
+        )
+
+
+def _downsample(x, **downsampling):
+    """Compute the low resolution frames of a video, a clip or a frame."""
+    # x['lr'] is only a placeholder
+    x["hr"], x["lr"] = super_resolution.downsample(x["hr"], **downsampling)
+    return x
+
+
+def _clip_starts(num_frames: List[int], length: int, stride: int) -> List[int]:
+    """Compute the positions of the first frames of the clips.
 
-            return {"hr": hr, "lr": lr}
+    The first clip of each sequence starts at the first frame of the sequence. Clips
+    never cross the border of two sequences.
 
-        return dataset.map(downsample)
+    Args:
+        num_frames: The number of frames of each sequence in the order of the records.
+        length: The number of frames of a clip.
+        stride: The distance between the first frames of two clips.
+    """
+    starts: List[int] = []
+    position = 0
+    for n in num_frames:
+        starts.extend(position + i for i in range(0, n - length + 1, stride))
+        position += n
+    return starts
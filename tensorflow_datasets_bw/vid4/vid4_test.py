@@ -1,13 +1,22 @@
 """vid4 dataset."""
 
 import tensorflow_datasets as tfds
+
 from . import vid4
+from .. import super_resolution, testing
 
 
 class Vid4Test(tfds.testing.DatasetBuilderTestCase):
     """Tests for vid4 dataset."""
 
     DATASET_CLASS = vid4.Vid4
+    BUILDER_CONFIG_NAMES_TO_TEST = [
+        "default",
+        "bicubic_x2",
+        "bicubic_x3",
+        "bicubic_x4",
+        "bicubic_aa_x4",
+    ]
     SPLITS = {
         "test": 4,  # Number of fake test example
     }
@@ -15,5 +24,89 @@ class Vid4Test(tfds.testing.DatasetBuilderTestCase):
     DL_EXTRACT_RESULT = "."
 
 
+class Vid4FramesTest(tfds.testing.DatasetBuilderTestCase):
+    """Tests for vid4 dataset with one example per frame."""
+
+    DATASET_CLASS = vid4.Vid4
+    BUILDER_CONFIG_NAMES_TO_TEST = ["frames", "frames_bicubic_x4"]
+    SPLITS = {
+        "test": 9,  # Number of fake test frames
+    }
+
+    DL_EXTRACT_RESULT = "."
+
+
+class Vid4ClipsTest(tfds.testing.TestCase):
+    """Tests for reading the vid4 frames and clips of them."""
+
+    # Frames of the dummy sequences: walk 3, foliage 1, city 2, calendar 3
+    NUM_FRAMES = {"walk": 3, "foliage": 1, "city": 2, "calendar": 3}
+
+    def _builder(self, config="frames", **kwargs):
+        builder = vid4.Vid4(data_dir=self.tmp_dir, config=config, **kwargs)
+        return testing.prepare_from_dummy_data(builder)
+
+    def _clips(self, clip_length, clip_stride, **kwargs):
+        builder = self._builder(clip_length=clip_length, clip_stride=clip_stride)
+        return list(tfds.as_numpy(builder.as_dataset(split="test", **kwargs)))
+
+    def test_clips(self):
+        for length, stride in [(2, 1), (2, 2), (3, 1), (1, 2)]:
+            clips = self._clips(length, stride)
+            expected = [
+                (sequence, start)
+                for sequence, n in self.NUM_FRAMES.items()
+                for start in range(0, n - length + 1, stride)
+            ]
+            self.assertEqual(
+                [(c["sequence"][0].decode(), c["frame"][0]) for c in clips], expected
+            )
+            for clip in clips:
+                # Consecutive frames of one sequence
+                self.assertLen(set(clip["sequence"]), 1)
+                first = clip["frame"][0]
+                self.assertAllEqual(clip["frame"], range(first, first + length))
+                self.assertEqual(clip["hr"].shape[0], length)
+                self.assertEqual(clip["hr"].shape[-1], 3)
+                self.assertEqual(
+                    clip["lr"].shape,
+                    (length, clip["hr"].shape[1] // 4, clip["hr"].shape[2] // 4, 3),
+                )
+
+    def test_shuffled_clips(self):
+        def keys(clips):
+            return sorted((c["sequence"][0], c["frame"][0]) for c in clips)
+
+        clips = self._clips(2, 1)
+        shuffled = self._clips(2, 1, shuffle_files=True)
+        self.assertEqual(keys(shuffled), keys(clips))
+
+    def test_materialized_clips(self):
+        builder = self._builder("frames_bicubic_x4", clip_length=2)
+        for clip in tfds.as_numpy(builder.as_dataset(split="test")):
+            self.assertEqual(clip["hr"].shape[0], 2)
+            hr_size = clip["hr"].shape[1:3]
+            self.assertEqual(clip["lr"].shape[1:3], (hr_size[0] // 4, hr_size[1] // 4))
+
+    def test_clips_require_frames(self):
+        builder = self._builder("default", clip_length=2)
+        with self.assertRaises(ValueError):
+            builder.as_dataset(split="test")
+
+    def test_materialized_lr(self):
+        builder = self._builder("frames_bicubic_x4")
+        frames = list(tfds.as_numpy(builder.as_dataset(split="test")))
+        self.assertLen(frames, sum(self.NUM_FRAMES.values()))
+        for frame in frames:
+            hr, lr = super_resolution.downsample(frame["hr"], scale=4)
+            self.assertAllEqual(frame["hr"], hr)
+            self.assertAllEqual(frame["lr"], lr)
+
+    def test_materialized_config_rejects_downsampling(self):
+        builder = self._builder("frames_bicubic_x4", scale=2)
+        with self.assertRaisesRegex(ValueError, "scale"):
+            builder.as_dataset(split="test")
+
+
 if __name__ == "__main__":
     tfds.testing.test_main()
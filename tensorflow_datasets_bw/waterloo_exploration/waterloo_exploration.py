@@ -2,10 +2,16 @@
 
 import os
 import glob
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 import imageio
+import tensorflow as tf
 import tensorflow_datasets as tfds
 
+from .. import parallel
+
 _DESCRIPTION = """
 The Waterloo Exploration database contains 4,744 pristine natural imageas and 94,880 distorted
 images and was created to evaluate image quality assessment models.
@@ -27,8 +33,6 @@ _CITATION = """
 }
 """  # noqa: E501
 
-# TODO Get rid of imageio dependency and improve performance
-
 
 class WaterlooExploration(tfds.core.GeneratorBasedBuilder):
     """DatasetBuilder for waterloo_exploration dataset."""
@@ -44,6 +48,23 @@ class WaterlooExploration(tfds.core.GeneratorBasedBuilder):
     https://ece.uwaterloo.ca/~k29ma/exploration/.
       """
 
+    def __init__(
+        self,
+        data_dir=None,
+        config=None,
+        version=None,
+        num_workers: Optional[int] = None,
+        use_beam: bool = False,
+    ) -> None:
+        super(WaterlooExploration, self).__init__(
+            data_dir=data_dir, config=config, version=version
+        )
+        # Number of threads to convert the images when generating the dataset
+        self.num_workers = num_workers
+        # Generate the dataset with Apache Beam (configure the runner with
+        # `tfds.download.DownloadConfig(beam_runner=..., beam_options=...)`)
+        self.use_beam = use_beam
+
     def _info(self) -> tfds.core.DatasetInfo:
         """Returns the dataset metadata."""
         return tfds.core.DatasetInfo(
@@ -64,18 +85,50 @@ class WaterlooExploration(tfds.core.GeneratorBasedBuilder):
             dl_manager.manual_dir, "exploration_database_and_code", "pristine_images"
         )
 
+        if self.use_beam:
+            return {
+                "train": self._build_pcollection(data_path),
+            }
         return {
             "train": self._generate_examples(data_path),
         }
 
     def _generate_examples(self, path):
         """Yields examples."""
-        files = glob.glob(os.path.join(path, "*.bmp"))
-        keys = [os.path.basename(n)[:-4] for n in files]
-        for key, f in zip(keys, files):
-            image = imageio.imread(f)
-            if image.shape[2] != 3:
-                # Some images contain an alpha channel
-                # Remove it
-                image = image[:, :, :3]
-            yield key, {"image": image}
+        items = _list_files(path)
+        keys = [key for key, _ in items]
+        files = [file for _, file in items]
+        num_workers = self.num_workers or multiprocessing.cpu_count()
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            # The TensorFlow ops release the GIL and run concurrently
+            images = parallel.imap_ordered(
+                executor, _bmp_to_png, files, max_pending=2 * num_workers
+            )
+            for key, image in zip(keys, images):
+                yield key, {"image": image}
+
+    def _build_pcollection(self, path):
+        """Returns a Beam transform which generates the examples."""
+        return parallel.beam_generate_examples(_list_files(path), _load_example)
+
+
+def _list_files(path):
+    """Returns the tuples of key and path of the images."""
+    files = glob.glob(os.path.join(path, "*.bmp"))
+    return [(os.path.basename(n)[:-4], n) for n in files]
+
+
+def _load_example(path):
+    return {"image": _bmp_to_png(path)}
+
+
+def _bmp_to_png(path):
+    """Convert a BMP image to a PNG encoded RGB image."""
+    contents = tf.io.read_file(path)
+    try:
+        # Some images contain an alpha channel which is removed by the decoder
+        image = tf.io.decode_bmp(contents, channels=3)
+    except tf.errors.InvalidArgumentError:
+        # Fall back to imageio for BMP variants which TensorFlow cannot decode
+        image = imageio.imread(path)[:, :, :3]
+    return tf.io.encode_png(image).numpy()
@@ -2,6 +2,7 @@
 
 import tensorflow_datasets as tfds
 from . import waterloo_exploration
+from .. import testing
 
 
 class WaterlooExplorationTest(tfds.testing.DatasetBuilderTestCase):
@@ -14,5 +15,14 @@ class WaterlooExplorationTest(tfds.testing.DatasetBuilderTestCase):
     DL_EXTRACT_RESULT = "exploration_database_and_code"
 
 
+class WaterlooExplorationBeamTest(tfds.testing.TestCase):
+    """Tests for generating the waterloo_exploration dataset with Apache Beam."""
+
+    def test_beam_matches_generator(self):
+        testing.assert_beam_matches_generator(
+            self, waterloo_exploration.WaterlooExploration, self.tmp_dir, "train", 3
+        )
+
+
 if __name__ == "__main__":
     tfds.testing.test_main()